@@ -0,0 +1,175 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import argparse
+from time import perf_counter
+
+import mlrose_hiive as mh
+import numpy as np
+
+from packed import PackedPopulation
+from problems import get_four_peaks_problem, get_k_colors_problem, get_knapsack_problem
+
+
+def get_fitness_functions(problem_type, length, seed):
+    if problem_type == "four_peaks":
+        fast_fitness = get_four_peaks_problem(length).fitness_fn
+        return mh.FourPeaks(t_pct=fast_fitness.t_pct), fast_fitness
+    elif problem_type == "knapsack":
+        fast_fitness = get_knapsack_problem(length, seed=seed).fitness_fn
+        slow_fitness = mh.Knapsack(list(fast_fitness.weights), list(fast_fitness.values))
+        return slow_fitness, fast_fitness
+    elif problem_type == "k_color":
+        fast_fitness = get_k_colors_problem(length, seed=seed).fitness_fn
+        return mh.MaxKColor(fast_fitness.edges), fast_fitness
+    raise Exception(f"Unsupported Problem Type of {problem_type}")
+
+
+def get_population(problem_type, length, population_size):
+    population = np.random.randint(0, 2, (population_size, length))
+    if problem_type == "four_peaks":
+        # Plant head/tail runs like those of a partly converged GA or MIMIC population
+        heads = np.random.randint(0, length + 1, population_size)
+        tails = np.random.randint(0, length + 1, population_size)
+        columns = np.arange(length)
+        population[columns < heads[:, np.newaxis]] = 1
+        population[columns >= (length - tails)[:, np.newaxis]] = 0
+    return population
+
+
+def evals_per_second(evaluate, population, repeats):
+    start_time = perf_counter()
+    for _ in range(repeats):
+        evaluate(population)
+    run_time = perf_counter() - start_time
+    return repeats * len(population) / run_time
+
+
+def benchmark_fitness(problem_type, length, population_size=1600, repeats=5, seed=1):
+    slow_fitness, fast_fitness = get_fitness_functions(problem_type, length, seed)
+
+    np.random.seed(seed)
+    population = get_population(problem_type, length, population_size)
+
+    slow_scores = np.array([slow_fitness.evaluate(state) for state in population])
+    fast_scores = fast_fitness.evaluate_many(population)
+    if not np.array_equal(slow_scores, fast_scores):
+        raise Exception(f"{problem_type} {length}: batched scores do not match per-state scores")
+
+    before = evals_per_second(
+        lambda pop: [slow_fitness.evaluate(state) for state in pop], population, repeats
+    )
+    after = evals_per_second(fast_fitness.evaluate_many, population, repeats)
+    print(
+        f"{problem_type:>10} length {length:>6} pop {population_size:>6}: "
+        f"per-state {before:>12,.0f} evals/s  batched {after:>14,.0f} evals/s  ({after / before:0.1f}x)"
+    )
+    return before, after
+
+
+def get_problem(problem_type, length, seed):
+    if problem_type == "four_peaks":
+        return get_four_peaks_problem(length)
+    elif problem_type == "knapsack":
+        return get_knapsack_problem(length, seed=seed)
+    elif problem_type == "k_color":
+        return get_k_colors_problem(length, seed=seed)
+    raise Exception(f"Unsupported Problem Type of {problem_type}")
+
+
+def moves_per_second(problem, moves):
+    # The RHC/SA inner loop: score a random neighbor, accept it half the time
+    start_time = perf_counter()
+    for i in range(moves):
+        neighbor = problem.random_neighbor()
+        problem.eval_fitness(neighbor)
+        if i % 2 == 0:
+            problem.set_state(neighbor)
+    run_time = perf_counter() - start_time
+    return moves / run_time
+
+
+def benchmark_moves(problem_type, length, moves=5000, seed=1):
+    problem = get_problem(problem_type, length, seed)
+    if not problem.incremental:
+        print(f"{problem_type:>10} length {length:>6}: no incremental scoring")
+        return
+
+    rates = []
+    for incremental in [False, True]:
+        problem.incremental = incremental
+        np.random.seed(seed)
+        problem.reset()
+        rates.append(moves_per_second(problem, moves))
+        final_fitness = problem.get_fitness()
+        if final_fitness != problem.eval_fitness(problem.get_state()):
+            raise Exception(f"{problem_type} {length}: incremental fitness drifted")
+
+    before, after = rates
+    print(
+        f"{problem_type:>10} length {length:>6} moves {moves:>6}: "
+        f"full {before:>12,.0f} moves/s  incremental {after:>10,.0f} moves/s  ({after / before:0.1f}x)"
+    )
+    return before, after
+
+
+def benchmark_packed(problem_type, length, population_size=1600, repeats=5, seed=1):
+    fast_fitness = get_problem(problem_type, length, seed).fitness_fn
+
+    np.random.seed(seed)
+    population = get_population(problem_type, length, population_size)
+    packed = PackedPopulation.from_states(population)
+
+    evaluate_packed = lambda bits: fast_fitness.evaluate_packed(bits, length)
+    if not np.array_equal(fast_fitness.evaluate_many(population), evaluate_packed(packed.bits)):
+        raise Exception(f"{problem_type} {length}: packed scores do not match batched scores")
+
+    before = evals_per_second(fast_fitness.evaluate_many, population, repeats)
+    after = evals_per_second(evaluate_packed, packed.bits, repeats)
+    print(
+        f"{problem_type:>10} length {length:>6} pop {population_size:>6}: "
+        f"int64 {before:>12,.0f} evals/s {population.nbytes:>12,} bytes  "
+        f"packed {after:>12,.0f} evals/s {packed.nbytes:>10,} bytes  ({after / before:0.1f}x)"
+    )
+    return before, after
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fitness Evaluation Benchmark")
+    parser.add_argument("problem_types", nargs="+", help="Problem types to benchmark")
+    parser.add_argument("-lengths", nargs="+", type=int, default=[30, 60, 90], help="Lengths")
+    parser.add_argument("-population", type=int, default=1600, help="Population size")
+    parser.add_argument("-repeats", type=int, default=5, help="Timed passes per length")
+    parser.add_argument("-seed", type=int, default=1, help="Random seed")
+    parser.add_argument(
+        "--moves", action="store_true", help="Benchmark single element moves as used by RHC/SA"
+    )
+    parser.add_argument(
+        "--packed", action="store_true", help="Benchmark bit-packed populations as used by GA/MIMIC"
+    )
+
+    args = parser.parse_args()
+
+    for problem_type in args.problem_types:
+        for length in args.lengths:
+            if args.moves:
+                benchmark_moves(problem_type, length, seed=args.seed)
+                continue
+            if args.packed:
+                benchmark_packed(
+                    problem_type,
+                    length,
+                    population_size=args.population,
+                    repeats=args.repeats,
+                    seed=args.seed,
+                )
+                continue
+            benchmark_fitness(
+                problem_type,
+                length,
+                population_size=args.population,
+                repeats=args.repeats,
+                seed=args.seed,
+            )
@@ -10,7 +10,13 @@ if __name__ == "__main__":
         "-lengths", nargs="+", type=int, default=[30, 60, 90], help="Lengths to add"
     )
     parser.add_argument("--xscale_log", action="store_true", help="Log the x scale")
+    parser.add_argument(
+        "--x_col",
+        choices=["Iteration", "Time", "FEvals"],
+        default=None,
+        help="Chart fitness against iterations, seconds or fitness evaluations (default from the job budget)",
+    )
 
     args = parser.parse_args()
 
-    problem_chart(args.job_file, xscale_log=args.xscale_log)
+    problem_chart(args.job_file, xscale_log=args.xscale_log, x_col=args.x_col)
@@ -13,6 +13,8 @@ ALGORITHM_PALETTE = {
     "MIMIC": (1.0, 0.4980392156862745, 0.054901960784313725),
     "Random Hill Climb": (0.17254901960784313, 0.6274509803921569, 0.17254901960784313),
     "Simulated Annealing": (0.8392156862745098, 0.15294117647058825, 0.1568627450980392),
+    "Parallel Tempering": (0.5803921568627451, 0.403921568627451, 0.7411764705882353),
+    "Island GA": (0.5490196078431373, 0.33725490196078434, 0.29411764705882354),
 }
 
 ALGORITHM_NAMES = {
@@ -20,10 +22,23 @@ ALGORITHM_NAMES = {
     "rhc": "Random Hill Climb",
     "ga": "Genetic Algorithm",
     "mimic": "MIMIC",
+    "pt": "Parallel Tempering",
+    "island_ga": "Island GA",
 }
 
 PROBLEM_NAMES = {"four_peaks": "Four Peaks", "knapsack": "Knapsack", "k_color": "K Colors"}
 
+# run_stats column to chart fitness against for each kind of job budget
+BUDGET_X_COLS = {"seconds": "Time", "fevals": "FEvals"}
+
+
+def budget_x_col(budget):
+    if budget is not None:
+        for name, x_col in BUDGET_X_COLS.items():
+            if budget.get(name) is not None:
+                return x_col
+    return "Iteration"
+
 
 def title_to_filename(title, location="figures", file_ending="png"):
     safe_title = title.replace(" ", "_")
@@ -141,6 +156,7 @@ def fitness_chart(
     use_algorithm_palette=False,
     filedir=None,
     include_y_label=True,
+    x_col="Iteration",
 ):
     # df_max = df.groupby(["Iteration", line_col]).agg({"Fitness": "max"}).reset_index()
 
@@ -160,7 +176,7 @@ def fitness_chart(
 
     sns.lineplot(
         data=df,
-        x="Iteration",
+        x=x_col,
         y="Fitness",
         hue=line_col,
         palette=palette,
@@ -174,7 +190,10 @@ def fitness_chart(
     if external_ax is None:
         info_settings_str = dict_to_str(info_settings)
         log_tag = "_log" if xscale_log else ""
-        save_to_file(plt, sup_title + " " + title + info_settings_str + log_tag, filedir=filedir)
+        x_tag = "" if x_col == "Iteration" else f"_by_{x_col}"
+        save_to_file(
+            plt, sup_title + " " + title + info_settings_str + x_tag + log_tag, filedir=filedir
+        )
 
 
 def time_chart(
@@ -231,6 +250,7 @@ def combination_chart(
     include_legend=True,
     output_directory=None,
     include_y_label=True,
+    x_col="Iteration",
 ):
 
     problem_dict = {"four_peaks": "Four Peaks", "knapsack": "Knapsack", "k_color": "K Colors"}
@@ -272,10 +292,40 @@ def combination_chart(
         )
         df_ga = df[
             (df["Population Size"] == Population_Size) & (df["Mutation Rate"] == Mutation_Rate)
-        ][["Iteration", "Fitness"]]
+        ][[x_col, "Fitness"]]
         df_ga["Algorithm Type"] = "Genetic Algorithm"
         concat_dfs.append(df_ga)
 
+    algorithm_type = "island_ga"
+    stats_file = f"{output_directory}/{experiment_name}/{algorithm_type}__{experiment_name}__run_stats_df.csv"
+    if check_exists(stats_file):
+        algorithms.append(ALGORITHM_NAMES[algorithm_type])
+        df = pd.read_csv(stats_file)
+        best_fitness = get_best_fitness(df, maximize)
+        island_ga_time = (
+            df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["Time"].iloc[0]
+        )
+        island_ga_evals = (
+            df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["FEvals"].iloc[0]
+        )
+        times.append(island_ga_time)
+        evals.append(island_ga_evals)
+        Population_Size = (
+            df[df["Fitness"] == best_fitness]
+            .sort_values(by=["Iteration"])["Population Size"]
+            .iloc[0]
+        )
+        Mutation_Rate = (
+            df[df["Fitness"] == best_fitness]
+            .sort_values(by=["Iteration"])["Mutation Rate"]
+            .iloc[0]
+        )
+        df_island_ga = df[
+            (df["Population Size"] == Population_Size) & (df["Mutation Rate"] == Mutation_Rate)
+        ][[x_col, "Fitness"]]
+        df_island_ga["Algorithm Type"] = "Island GA"
+        concat_dfs.append(df_island_ga)
+
     algorithm_type = "mimic"
     stats_file = f"{output_directory}/{experiment_name}/{algorithm_type}__{experiment_name}__run_stats_df.csv"
     if check_exists(stats_file):
@@ -300,7 +350,7 @@ def combination_chart(
         )
         df_mimic = df[
             (df["Population Size"] == Population_Size) & (df["Keep Percent"] == Keep_Percent)
-        ][["Iteration", "Fitness"]]
+        ][[x_col, "Fitness"]]
         df_mimic["Algorithm Type"] = "MIMIC"
         concat_dfs.append(df_mimic)
 
@@ -319,7 +369,7 @@ def combination_chart(
         restarts = (
             df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["Restarts"].iloc[0]
         )
-        df_rhc = df[df["Restarts"] == restarts][["Iteration", "Fitness"]]
+        df_rhc = df[df["Restarts"] == restarts][[x_col, "Fitness"]]
         df_rhc["Algorithm Type"] = "Random Hill Climb"
         concat_dfs.append(df_rhc)
 
@@ -344,11 +394,30 @@ def combination_chart(
             df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["Temperature"].iloc[0]
         )
         df_sa = df[(df["Temperature"] == Temperature) & (df["schedule_type"] == schedule_type)][
-            ["Iteration", "Fitness"]
+            [x_col, "Fitness"]
         ]
         df_sa["Algorithm Type"] = "Simulated Annealing"
         concat_dfs.append(df_sa)
 
+    algorithm_type = "pt"
+    stats_file = f"{output_directory}/{experiment_name}/{algorithm_type}__{experiment_name}__run_stats_df.csv"
+    if check_exists(stats_file):
+        algorithms.append(ALGORITHM_NAMES[algorithm_type])
+        df = pd.read_csv(stats_file)
+        best_fitness = get_best_fitness(df, maximize)
+        pt_time = df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["Time"].iloc[0]
+        pt_evals = (
+            df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["FEvals"].iloc[0]
+        )
+        times.append(pt_time)
+        evals.append(pt_evals)
+        Temperature = (
+            df[df["Fitness"] == best_fitness].sort_values(by=["Iteration"])["Temperature"].iloc[0]
+        )
+        df_pt = df[df["Temperature"] == Temperature][[x_col, "Fitness"]]
+        df_pt["Algorithm Type"] = "Parallel Tempering"
+        concat_dfs.append(df_pt)
+
     df_master = pd.concat(concat_dfs)
     sup_title = f"{problem_name} ({experiment_name})"
     curve_title = "Algorithm Fitness Curves" if curve_title is None else curve_title
@@ -367,6 +436,7 @@ def combination_chart(
         include_legend=include_legend,
         use_algorithm_palette=True,
         include_y_label=include_y_label,
+        x_col=x_col,
     )
 
     y_label = "Time (s)" if include_y_label else None
@@ -393,11 +463,12 @@ def combination_chart(
     )
 
 
-def problem_chart(job_file, xscale_log=False):
+def problem_chart(job_file, xscale_log=False, x_col=None):
     file_dir, job_filename = get_file_and_directory(job_file)
     job = import_item_from_module_file(job_file, "job")
     problem = job["problem"]
     lengths = job["lengths"].keys()
+    x_col = budget_x_col(job.get("budget")) if x_col is None else x_col
 
     experiment_count = len(lengths)
     fig = plt.figure(figsize=(4 * experiment_count, 8))
@@ -436,6 +507,7 @@ def problem_chart(job_file, xscale_log=False):
             include_legend=include_legend,
             output_directory=file_dir,
             include_y_label=include_y_label,
+            x_col=x_col,
         )
     handles, labels = ax_lines[0].get_legend_handles_labels()
     ax_lines[0].get_legend().remove()
@@ -447,7 +519,8 @@ def problem_chart(job_file, xscale_log=False):
         bbox_to_anchor=(0.5, 0.955),
     )
     plt.subplots_adjust(hspace=2)
-    save_to_file(plt, f"{problem}", filedir=file_dir)
+    x_tag = "" if x_col == "Iteration" else f"_by_{x_col}"
+    save_to_file(plt, f"{problem}{x_tag}", filedir=file_dir)
 
 
 def neural_training_chart(
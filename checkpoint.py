@@ -0,0 +1,250 @@
+import inspect
+import os
+import pickle as pk
+from time import perf_counter
+
+import numpy as np
+
+# Runner attributes holding the rows and bookkeeping of the runs so far
+RUNNER_STATE = [
+    "_raw_run_stats",
+    "_fitness_curves",
+    "_curve_base",
+    "_iteration_times",
+    "_first_curve_synthesized",
+    "_copy_zero_curve_fitness_from_first",
+]
+
+
+class _ProblemPickler(pk.Pickler):
+    # Saves references to the problem, such as the bound methods and
+    # crossover and mutator objects of a DiscreteOpt, as references to
+    # whichever problem loads the checkpoint
+    def __init__(self, file, problem):
+        super().__init__(file)
+        self.problem = problem
+
+    def persistent_id(self, obj):
+        return "problem" if obj is self.problem else None
+
+
+class _ProblemUnpickler(pk.Unpickler):
+    def __init__(self, file, problem):
+        super().__init__(file)
+        self.problem = problem
+
+    def persistent_load(self, pid):
+        return self.problem
+
+
+class OffsetSchedule:
+    """Decay schedule that carries on another schedule from a later iteration."""
+
+    def __init__(self, schedule, offset):
+        self.schedule = schedule
+        self.offset = offset
+
+    def evaluate(self, t):
+        return self.schedule.evaluate(t + self.offset)
+
+
+class CheckpointMixin:
+    """Once enable_checkpoints has been called, writes a checkpoint at every
+    iteration_list point of every run, and after every grid configuration.
+
+    A checkpoint holds the run_stats and curve rows so far and the grid
+    configuration that is running. For a run in progress it also holds the
+    iteration, attempts, restart and curve, the problem attributes (current
+    state, population, fitness evaluations and fitness cache) and the numpy
+    random state. Each problem's best state so far is its current state, as
+    for every mlrose algorithm here.
+
+    With resume=True, configurations finished before the checkpoint are
+    skipped. The running one starts again with the problem's reset() and
+    random_pop() restoring the checkpoint, and the callback shifts
+    iterations, attempts, restarts and the SA schedule to where the run left
+    off. A resumed run writes the same rows as one that never stopped, apart
+    from Time.
+
+    Runners that override run() instead of running their grid through
+    run_experiment_ never write a checkpoint, and start again on a resume.
+    """
+
+    checkpoint_path = None
+    _resume = None
+
+    def enable_checkpoints(self, resume=False):
+        if not hasattr(self.problem, "resume_from"):
+            raise Exception(f"Cannot checkpoint a {type(self.problem).__name__} problem")
+        self.checkpoint_path = f"{self._get_pickle_filename_root('checkpoint')}.p"
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "rb") as checkpoint_file:
+                self._resume = _ProblemUnpickler(checkpoint_file, self.problem).load()
+
+    def remove_checkpoint(self):
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _setup(self):
+        super()._setup()
+        self._configuration = -1
+        self._resumed_run = None
+
+    def _write_checkpoint(self, configuration, run=None):
+        checkpoint = {
+            "configuration": configuration,
+            "runner": {name: getattr(self, name) for name in RUNNER_STATE},
+            "run": run,
+        }
+        # Written under a temporary name and renamed, so a stop while writing
+        # leaves the previous checkpoint in place
+        temp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as checkpoint_file:
+            _ProblemPickler(checkpoint_file, self.problem).dump(checkpoint)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _invoke_algorithm(
+        self,
+        algorithm,
+        problem,
+        max_attempts,
+        curve,
+        user_info,
+        additional_algorithm_args=None,
+        **total_args,
+    ):
+        if self.checkpoint_path is None:
+            return super()._invoke_algorithm(
+                algorithm,
+                problem,
+                max_attempts,
+                curve,
+                user_info,
+                additional_algorithm_args,
+                **total_args,
+            )
+
+        self._configuration += 1
+        resume = self._resume
+        if resume is not None:
+            if self._configuration == 0:
+                for name, value in resume["runner"].items():
+                    setattr(self, name, value)
+            if self._configuration < resume["configuration"]:
+                return None, None, None
+            self._resume = None
+
+        self._current_logged_algorithm_args.update(total_args)
+        if additional_algorithm_args is not None:
+            self._current_logged_algorithm_args.update(additional_algorithm_args)
+
+        self._print_banner("*** Run START ***")
+        np.random.seed(self.seed)
+        valid_args = [k for k in inspect.signature(algorithm).parameters]
+        args_to_pass = {k: v for k, v in total_args.items() if k in valid_args}
+
+        run = None if resume is None else resume["run"]
+        if run is None:
+            self._resumed_run = None
+            self._start_run_timing()
+            problem.reset()
+        else:
+            self._resumed_run = {
+                "iteration": run["iteration"],
+                "attempts": run["attempts"],
+                "restart": run["restart"],
+                "curve": run["curve"],
+                "skip_start": True,
+            }
+            self._run_start_time = perf_counter() - run["time"]
+            problem.resume_from(run["problem"], run["random_state"], self._run_start_time)
+            if "schedule" in args_to_pass:
+                args_to_pass["schedule"] = OffsetSchedule(
+                    args_to_pass["schedule"], run["iteration"]
+                )
+            if "restarts" in args_to_pass:
+                args_to_pass["restarts"] -= run["restart"]
+
+        ret = algorithm(
+            problem=problem,
+            max_attempts=max_attempts,
+            curve=curve,
+            random_state=self.seed,
+            state_fitness_callback=self._save_state,
+            callback_user_info=user_info,
+            **args_to_pass,
+        )
+        self._print_banner("*** Run END ***")
+        self._curve_base = len(self._fitness_curves)
+        self._resumed_run = None
+        self._write_checkpoint(self._configuration + 1)
+        return ret
+
+    def _save_state(
+        self,
+        iteration,
+        state,
+        fitness,
+        user_data,
+        attempt=0,
+        done=False,
+        curve=None,
+        fitness_evaluations=None,
+    ):
+        if self.checkpoint_path is None:
+            return super()._save_state(
+                iteration, state, fitness, user_data, attempt, done, curve, fitness_evaluations
+            )
+
+        attempts = attempt - 1 if iteration > 0 else 0
+        restart = dict(user_data).get("current_restart", 0)
+        resumed = self._resumed_run
+        if resumed is not None:
+            # The resumed algorithm reports the start it skipped as iteration 0
+            if iteration == 0 and resumed["skip_start"]:
+                resumed["skip_start"] = False
+                return True
+
+            restart += resumed["restart"]
+            user_data = [(n, restart if n == "current_restart" else v) for n, v in user_data]
+            if curve is not None and resumed["curve"] is not None:
+                curve = (
+                    resumed["curve"] if len(curve) == 0 else np.vstack((resumed["curve"], curve))
+                )
+
+            if iteration == 0:
+                # A later RHC restart starts from scratch
+                resumed["iteration"] = 0
+                resumed["attempts"] = 0
+            else:
+                # The algorithm counts attempts from zero again, until its
+                # first improvement
+                if attempts == 0:
+                    resumed["attempts"] = 0
+                attempts += resumed["attempts"]
+                iteration += resumed["iteration"]
+                max_iters = self._current_logged_algorithm_args["max_iters"]
+                done = (
+                    (attempts >= self.max_attempts)
+                    or (iteration >= max_iters)
+                    or self.problem.can_stop()
+                )
+
+        keep_going = super()._save_state(
+            iteration, state, fitness, user_data, attempts + 1, done, curve, fitness_evaluations
+        )
+
+        if iteration > 0 and not done and iteration in self.iteration_list:
+            self._write_checkpoint(
+                self._configuration,
+                {
+                    "iteration": iteration,
+                    "attempts": attempts,
+                    "restart": restart,
+                    "curve": None if curve is None else np.asarray(curve),
+                    "time": self._iteration_times[-1],
+                    "problem": dict(self.problem.__dict__),
+                    "random_state": np.random.get_state(),
+                },
+            )
+        return keep_going
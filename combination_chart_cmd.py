@@ -8,7 +8,15 @@ if __name__ == "__main__":
     parser.add_argument("problem_type", help="Type of problem")
     parser.add_argument("experiment_name", help="Experiment Name - usually length_XX")
     parser.add_argument("--xscale_log", action="store_true", help="Log the x scale")
+    parser.add_argument(
+        "--x_col",
+        choices=["Iteration", "Time", "FEvals"],
+        default="Iteration",
+        help="Chart fitness against iterations, seconds or fitness evaluations",
+    )
 
     args = parser.parse_args()
 
-    combination_chart(args.problem_type, args.experiment_name, xscale_log=args.xscale_log)
+    combination_chart(
+        args.problem_type, args.experiment_name, xscale_log=args.xscale_log, x_col=args.x_col
+    )
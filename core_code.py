@@ -1,3 +1,4 @@
+import os
 import string
 import sys
 
@@ -5,7 +6,6 @@ import six
 
 sys.modules["sklearn.externals.six"] = six
 from itertools import repeat
-from multiprocessing.pool import Pool
 from shutil import copy2
 from time import time
 
@@ -13,28 +13,42 @@ import mlrose_hiive as mh
 import numpy as np
 import pandas as pd
 
-from charting import fitness_chart, problem_chart
+from charting import budget_x_col, fitness_chart, problem_chart
 from helpers import (
+    JOB_WORKERS,
+    NestablePool,
     get_file_and_directory,
     get_filedir,
+    get_latest_filedir,
     import_item_from_module_file,
     load_dict_from_json,
     save_json_to_file,
 )
+from instance_store import InstanceStore
 from problems import get_four_peaks_problem, get_k_colors_problem, get_knapsack_problem
-
-
-def get_problem(problem_type, length, seed):
+from ga_engine import VectorizedGARunner
+from island_engine import IslandGARunner
+from mimic_engine import FastMIMICRunner
+from racing import RacingRunner
+from pt_engine import ParallelTemperingRunner
+from rhc_engine import ParallelRHCRunner
+from runners import GARunner, MIMICRunner, RHCRunner, SARunner
+from sa_engine import LockstepSARunner
+from search import SearchRunner
+
+
+def get_problem(problem_type, length, seed, instance_directory=None):
+    instance_store = None if instance_directory is None else InstanceStore(instance_directory)
     maximize = True
     if problem_type == "four_peaks":
         sup_title = f"Four Peaks (length={length})"
         problem = get_four_peaks_problem(length=length)
     elif problem_type == "knapsack":
         sup_title = f"Knapsack (length={length})"
-        problem = get_knapsack_problem(length=length, seed=seed)
+        problem = get_knapsack_problem(length=length, seed=seed, instance_store=instance_store)
     elif problem_type == "k_color":
         sup_title = f"K Colors (length={length})"
-        problem = get_k_colors_problem(length=length, seed=seed)
+        problem = get_k_colors_problem(length=length, seed=seed, instance_store=instance_store)
         maximize = False
     else:
         raise Exception(f"Unsupported Problem Type of {problem_type}")
@@ -62,7 +76,17 @@ def get_runner(
             return
         info_settings["r"] = kwargs["restarts"]
 
-        runner = mh.RHCRunner(
+        runner_kwargs = {}
+        if kwargs.get("engine") == "parallel":
+            rhc_runner = ParallelRHCRunner
+            if kwargs.get("workers") is not None:
+                runner_kwargs["workers"] = kwargs["workers"]
+        elif kwargs.get("engine") is None:
+            rhc_runner = RHCRunner
+        else:
+            raise Exception(f"Unsupported RHC engine of {kwargs['engine']}")
+
+        runner = rhc_runner(
             problem=problem,
             experiment_name=experiment_name,
             output_directory=output_directory,
@@ -70,6 +94,7 @@ def get_runner(
             iteration_list=iteration_list,
             max_attempts=max_attempts,
             restart_list=kwargs["restarts"],
+            **runner_kwargs,
         )
 
         title = "Random Hill Climbing"
@@ -99,7 +124,11 @@ def get_runner(
         info_settings["d"] = kwargs["decays"]
         info_settings["t"] = kwargs["temperatures"]
 
-        runner = mh.SARunner(
+        if kwargs.get("engine") not in [None, "lockstep"]:
+            raise Exception(f"Unsupported SA engine of {kwargs['engine']}")
+        sa_runner = LockstepSARunner if kwargs.get("engine") == "lockstep" else SARunner
+
+        runner = sa_runner(
             problem=problem,
             experiment_name=experiment_name,
             output_directory=output_directory,
@@ -121,6 +150,33 @@ def get_runner(
         if len(kwargs["temperatures"]) > 1:
             all_line_cols.append("Temperature")
 
+    elif algorithm_type == "pt":
+        if "temperatures" not in kwargs:
+            print(f"PT needs -temperatures 1 2 4 8 ")
+            return
+
+        info_settings["t"] = kwargs["temperatures"]
+
+        runner_kwargs = {}
+        if kwargs.get("swap_interval") is not None:
+            runner_kwargs["swap_interval"] = kwargs["swap_interval"]
+
+        runner = ParallelTemperingRunner(
+            problem=problem,
+            experiment_name=experiment_name,
+            output_directory=output_directory,
+            seed=seed,
+            iteration_list=iteration_list,
+            max_attempts=max_attempts,
+            temperature_list=kwargs["temperatures"],
+            **runner_kwargs,
+        )
+
+        title = "Parallel Tempering"
+        line_col = "Temperature"
+        if len(kwargs["temperatures"]) > 1:
+            all_line_cols.append("Temperature")
+
     elif algorithm_type == "ga":
         if "populations" not in kwargs:
             print(f"GA needs -populations 50 100 200")
@@ -132,7 +188,18 @@ def get_runner(
         info_settings["p"] = kwargs["populations"]
         info_settings["mu"] = kwargs["mutations"]
 
-        runner = mh.GARunner(
+        runner_kwargs = {}
+        if kwargs.get("engine") == "vectorized":
+            ga_runner = VectorizedGARunner
+            for key in ["crossover", "mutation"]:
+                if kwargs.get(key) is not None:
+                    runner_kwargs[key] = kwargs[key]
+        elif kwargs.get("engine") is None:
+            ga_runner = GARunner
+        else:
+            raise Exception(f"Unsupported GA engine of {kwargs['engine']}")
+
+        runner = ga_runner(
             problem=problem,
             experiment_name=experiment_name,
             output_directory=output_directory,
@@ -141,6 +208,7 @@ def get_runner(
             max_attempts=max_attempts,
             population_sizes=kwargs["populations"],
             mutation_rates=kwargs["mutations"],
+            **runner_kwargs,
         )
 
         title = "Genetic Algorithm"
@@ -154,6 +222,54 @@ def get_runner(
         if len(kwargs["mutations"]) > 1:
             all_line_cols.append("Mutation Rate")
 
+    elif algorithm_type == "island_ga":
+        if "populations" not in kwargs:
+            print(f"Island GA needs -populations 400 800 1600")
+            return
+        if "mutations" not in kwargs:
+            print(f"Island GA needs -mutations 0.1 0.2 0.3")
+            return
+
+        info_settings["p"] = kwargs["populations"]
+        info_settings["mu"] = kwargs["mutations"]
+
+        runner_kwargs = {}
+        for key in [
+            "islands",
+            "migration_interval",
+            "migrants",
+            "topology",
+            "crossover",
+            "mutation",
+        ]:
+            if kwargs.get(key) is not None:
+                runner_kwargs[key] = kwargs[key]
+        if "islands" in runner_kwargs:
+            info_settings["i"] = runner_kwargs["islands"]
+
+        runner = IslandGARunner(
+            problem=problem,
+            experiment_name=experiment_name,
+            output_directory=output_directory,
+            seed=seed,
+            iteration_list=iteration_list,
+            max_attempts=max_attempts,
+            population_sizes=kwargs["populations"],
+            mutation_rates=kwargs["mutations"],
+            **runner_kwargs,
+        )
+
+        title = "Island GA"
+        if len(kwargs["populations"]) > 1:
+            line_col = "Population Size"
+        else:
+            line_col = "Mutation Rate"
+
+        if len(kwargs["populations"]) > 1:
+            all_line_cols.append("Population Size")
+        if len(kwargs["mutations"]) > 1:
+            all_line_cols.append("Mutation Rate")
+
     elif algorithm_type == "mimic":
         if "keep_percents" not in kwargs:
             print(f"MIMIC needs -keep_percents 0.1 0.2 0.3")
@@ -165,7 +281,17 @@ def get_runner(
         info_settings["p"] = kwargs["populations"]
         info_settings["k"] = kwargs["keep_percents"]
 
-        runner = mh.MIMICRunner(
+        runner_kwargs = {}
+        if kwargs.get("engine") == "fast":
+            mimic_runner = FastMIMICRunner
+            if kwargs.get("workers") is not None:
+                runner_kwargs["workers"] = kwargs["workers"]
+        elif kwargs.get("engine") is None:
+            mimic_runner = MIMICRunner
+        else:
+            raise Exception(f"Unsupported MIMIC engine of {kwargs['engine']}")
+
+        runner = mimic_runner(
             problem=problem,
             experiment_name=experiment_name,
             output_directory=output_directory,
@@ -174,6 +300,7 @@ def get_runner(
             max_attempts=max_attempts,
             keep_percent_list=kwargs["keep_percents"],
             population_sizes=kwargs["populations"],
+            **runner_kwargs,
         )
 
         title = "MIMIC"
@@ -207,6 +334,21 @@ def fitness_chart_from_csv(directory, run_info_file):
     )
 
 
+def target_hit(df_run_stats, target_fitness, maximize):
+    # Time and FEvals of the run that reached the target first. The row of the
+    # iteration that reached it is always saved, since the run stops there.
+    if maximize:
+        df_hit = df_run_stats[df_run_stats["Fitness"] >= target_fitness]
+    else:
+        df_hit = df_run_stats[df_run_stats["Fitness"] <= target_fitness]
+    hit = {"fitness": target_fitness, "hit": len(df_hit) > 0}
+    if len(df_hit) > 0:
+        first_hit = df_hit.sort_values(by=["Time"]).iloc[0]
+        hit["time"] = float(first_hit["Time"])
+        hit["fevals"] = int(first_hit["FEvals"])
+    return hit
+
+
 def run_algorithm_with_problem(
     problem_type,
     algorithm_type,
@@ -215,6 +357,16 @@ def run_algorithm_with_problem(
     max_iterations=500,
     max_attempts=50,
     output_directory=None,
+    fitness_cache=None,
+    visited_index=None,
+    instance_directory="instances",
+    racing=None,
+    search=None,
+    checkpoint=False,
+    resume=False,
+    budget=None,
+    target=None,
+    warm_start=None,
     **kwargs,
 ):
     print(f"Starting {problem_type} {algorithm_type} {length} {output_directory}")
@@ -224,8 +376,47 @@ def run_algorithm_with_problem(
     output_directory = (
         f"experiments/{problem_type}" if output_directory is None else output_directory
     )
-
-    sup_title, problem, maximize = get_problem(problem_type, length, seed)
+    run_data_file = (
+        f"{output_directory}/{experiment_name}/{algorithm_type}__{experiment_name}__run_data.json"
+    )
+    if resume and os.path.exists(run_data_file):
+        print(f"    {problem_type} {algorithm_type} {length} already finished")
+        return None
+
+    sup_title, problem, maximize = get_problem(problem_type, length, seed, instance_directory)
+    if algorithm_type in ["ga", "island_ga"]:
+        # Converged populations are mostly copies of a few states, each of
+        # which only needs scoring once per generation
+        problem.deduplicate_populations = True
+    if fitness_cache is not None:
+        problem.enable_fitness_cache(fitness_cache)
+    if visited_index is not None:
+        # The index follows single moves from random_neighbor, which only the
+        # standard rhc and sa runners make one at a time
+        if algorithm_type not in ["rhc", "sa"] or kwargs.get("engine") is not None:
+            raise Exception("A visited index is supported by rhc and sa without an engine")
+        problem.enable_visited_index(visited_index)
+    if budget is not None:
+        # These engines run their whole grid or every restart in one loop,
+        # so a budget per algorithm run does not apply to them
+        if kwargs.get("engine") in ["lockstep", "parallel"]:
+            raise Exception(f"A budget is not supported by the {kwargs['engine']} engine")
+        problem.set_budget(**budget)
+    if target is not None:
+        target_fitness = problem.optimum() if target == "optimum" else target
+        if target_fitness is None:
+            print(f"    {problem_type} {algorithm_type} {length} has no known optimum to target")
+        else:
+            problem.set_target(target_fitness)
+    if warm_start is not None:
+        # These engines draw the start state of every chain or restart
+        # themselves
+        if kwargs.get("engine") in ["lockstep", "parallel"]:
+            raise Exception(f"A warm start is not supported by the {kwargs['engine']} engine")
+        if problem.warm_start_heuristic is None:
+            print(f"    {problem_type} {algorithm_type} {length} has no warm start heuristic")
+        else:
+            problem.enable_warm_start(warm_start)
 
     runner, title, line_col, all_line_cols = get_runner(
         algorithm_type,
@@ -238,6 +429,25 @@ def run_algorithm_with_problem(
         max_attempts,
         **kwargs,
     )
+    if algorithm_type == "pt" and (racing is not None or search is not None):
+        raise Exception(f"Racing and search are not supported for pt, which runs a ladder at once")
+    if racing is not None and search is not None:
+        raise Exception(f"Use either racing or search for {algorithm_type}, not both")
+    if racing is not None:
+        runner = RacingRunner(runner, maximize, **racing)
+    if search is not None:
+        runner = SearchRunner(runner, maximize, **search)
+    # Racing and search run copies of the runner, which start again on a resume,
+    # and pt and island_ga run all their chains or islands in one call that is
+    # never checkpointed
+    checkpoint = (
+        (checkpoint or resume)
+        and racing is None
+        and search is None
+        and algorithm_type not in ["pt", "island_ga"]
+    )
+    if checkpoint:
+        runner.enable_checkpoints(resume=resume)
 
     # the two data frames will contain the results
     start_time = time()
@@ -280,10 +490,31 @@ def run_algorithm_with_problem(
         "maximize": maximize,
         "info_settings": info_settings,
     }
-    save_json_to_file(
-        run_info,
-        f"{output_directory}/{experiment_name}/{algorithm_type}__{experiment_name}__run_data.json",
-    )
+    if kwargs.get("engine") is not None:
+        run_info["engine"] = kwargs["engine"]
+    if problem.instance is not None:
+        run_info["instance"] = problem.instance
+    if fitness_cache is not None:
+        run_info["fitness_cache"] = problem.fitness_cache.stats()
+    if visited_index is not None:
+        run_info["visited_index"] = problem.visited_index.stats()
+    if budget is not None:
+        run_info["budget"] = budget
+    if problem.warm_start_info is not None:
+        run_info["warm_start"] = problem.warm_start_info
+    if problem.target_fitness is not None:
+        run_info["target"] = target_hit(df_run_stats, problem.target_fitness, maximize)
+    if algorithm_type == "pt":
+        run_info["pt"] = runner.info()
+    if algorithm_type == "island_ga":
+        run_info["island_ga"] = runner.info()
+    if racing is not None:
+        run_info["racing"] = runner.info()
+    if search is not None:
+        run_info["search"] = runner.info()
+    save_json_to_file(run_info, run_data_file)
+    if checkpoint:
+        runner.remove_checkpoint()
 
     stats_file = f"{output_directory}/{experiment_name}/{algorithm_type}__{experiment_name}__run_stats_df.csv"
     df = pd.read_csv(stats_file)
@@ -315,6 +546,7 @@ def run_algorithm_with_problem(
                 maximize=maximize,
                 info_settings=info_settings,
                 filedir=f"{output_directory}/{experiment_name}/",
+                x_col=budget_x_col(budget),
             )
 
     fitness_chart(
@@ -326,6 +558,7 @@ def run_algorithm_with_problem(
         maximize=maximize,
         info_settings=info_settings,
         filedir=f"{output_directory}/{experiment_name}/",
+        x_col=budget_x_col(budget),
     )
 
     return best_fitness
@@ -340,7 +573,7 @@ def apply_args_and_kwargs(fn, args, kwargs):
     return fn(*args, **kwargs)
 
 
-def run_multi_job(job_file):
+def run_multi_job(job_file, resume=False):
     job = import_item_from_module_file(job_file, "job")
 
     args_iter = []
@@ -348,7 +581,10 @@ def run_multi_job(job_file):
     problem = job["problem"]
     description = job["description"]
     dir_name = f"{problem}_{description}"
-    output_directory = get_filedir(dir_name, "experiments")
+    if resume:
+        output_directory = get_latest_filedir(dir_name, "experiments")
+    else:
+        output_directory = get_filedir(dir_name, "experiments")
     # Copy Job
     copy2(job_file, output_directory)
 
@@ -367,10 +603,16 @@ def run_multi_job(job_file):
                     "populations": length_settings["populations"],
                     "mutations": length_settings["mutations"],
                     "keep_percents": length_settings["keep_percents"],
+                    "budget": job.get("budget"),
+                    "target": job.get("target"),
+                    "warm_start": job.get("warm_start"),
+                    "instance_directory": job.get("instance_directory", "instances"),
+                    "checkpoint": job.get("checkpoint", False),
+                    "resume": resume,
                 }
             )
 
-    with Pool(8) as pool:
+    with NestablePool(JOB_WORKERS) as pool:
         starmap_with_kwargs(pool, run_algorithm_with_problem, args_iter, kwargs_iter)
 
     directory, filename = get_file_and_directory(job_file)
@@ -378,7 +620,7 @@ def run_multi_job(job_file):
     problem_chart(f"{output_directory}/{filename}")
 
 
-def run_mjob(job_file):
+def run_mjob(job_file, resume=False):
     job = import_item_from_module_file(job_file, "job")
 
     args_iter = []
@@ -386,7 +628,10 @@ def run_mjob(job_file):
     problem = job["problem"]
     description = job["description"]
     dir_name = f"{problem}_{description}"
-    output_directory = get_filedir(dir_name, "experiments")
+    if resume:
+        output_directory = get_latest_filedir(dir_name, "experiments")
+    else:
+        output_directory = get_filedir(dir_name, "experiments")
     # Copy Job
     copy2(job_file, output_directory)
 
@@ -417,10 +662,61 @@ def run_mjob(job_file):
                     "keep_percents": algorithm_settings["keep_percents"]
                     if "keep_percents" in algorithm_settings
                     else None,
+                    "fitness_cache": algorithm_settings["fitness_cache"]
+                    if "fitness_cache" in algorithm_settings
+                    else None,
+                    "warm_start": algorithm_settings["warm_start"]
+                    if "warm_start" in algorithm_settings
+                    else job.get("warm_start"),
+                    "visited_index": algorithm_settings["visited_index"]
+                    if "visited_index" in algorithm_settings
+                    else None,
+                    "engine": algorithm_settings["engine"]
+                    if "engine" in algorithm_settings
+                    else None,
+                    "crossover": algorithm_settings["crossover"]
+                    if "crossover" in algorithm_settings
+                    else None,
+                    "mutation": algorithm_settings["mutation"]
+                    if "mutation" in algorithm_settings
+                    else None,
+                    "workers": algorithm_settings["workers"]
+                    if "workers" in algorithm_settings
+                    else None,
+                    "swap_interval": algorithm_settings["swap_interval"]
+                    if "swap_interval" in algorithm_settings
+                    else None,
+                    "islands": algorithm_settings["islands"]
+                    if "islands" in algorithm_settings
+                    else None,
+                    "migration_interval": algorithm_settings["migration_interval"]
+                    if "migration_interval" in algorithm_settings
+                    else None,
+                    "migrants": algorithm_settings["migrants"]
+                    if "migrants" in algorithm_settings
+                    else None,
+                    "topology": algorithm_settings["topology"]
+                    if "topology" in algorithm_settings
+                    else None,
+                    "racing": algorithm_settings["racing"]
+                    if "racing" in algorithm_settings
+                    else None,
+                    "search": algorithm_settings["search"]
+                    if "search" in algorithm_settings
+                    else None,
+                    "budget": algorithm_settings["budget"]
+                    if "budget" in algorithm_settings
+                    else job.get("budget"),
+                    "target": algorithm_settings["target"]
+                    if "target" in algorithm_settings
+                    else job.get("target"),
+                    "instance_directory": job.get("instance_directory", "instances"),
+                    "checkpoint": job.get("checkpoint", False),
+                    "resume": resume,
                 }
             )
 
-    with Pool(8) as pool:
+    with NestablePool(JOB_WORKERS) as pool:
         starmap_with_kwargs(pool, run_algorithm_with_problem, args_iter, kwargs_iter)
 
     directory, filename = get_file_and_directory(job_file)
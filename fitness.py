@@ -0,0 +1,292 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import mlrose_hiive as mh
+import numpy as np
+
+from packed import BYTE_BITS, LEADING_ONES, TRAILING_ZEROS, bit_masks
+
+
+def run_lengths(population, value):
+    # Length of the leading run of value in each row. Columns are scanned in
+    # doubling blocks so rows whose run ends early stop being looked at.
+    rows, length = population.shape
+    lengths = np.zeros(rows, dtype=np.int64)
+    active = np.arange(rows)
+    start = 0
+    block = 16
+    while len(active) > 0 and start < length:
+        stop = min(start + block, length)
+        matches = population[active, start:stop] == value
+        all_match = matches.all(axis=1)
+        lengths[active] += np.where(all_match, stop - start, np.argmin(matches, axis=1))
+        active = active[all_match]
+        start = stop
+        block *= 2
+    return lengths
+
+
+def packed_run_lengths(bits, full_byte, byte_table):
+    # Length of the leading run of bits in each packed row, where full_byte is
+    # a byte made only of that bit and byte_table gives the run inside a byte
+    full = bits == full_byte
+    first = np.argmin(full, axis=1)
+    lengths = 8 * first + byte_table[bits[np.arange(len(bits)), first]]
+    return np.where(full.all(axis=1), 8 * bits.shape[1], lengths)
+
+
+class FastFourPeaks(mh.FourPeaks):
+    """Four Peaks that can score a whole (population x length) array in one pass."""
+
+    def evaluate(self, state):
+        return self.evaluate_many(np.asarray(state)[np.newaxis, :])[0]
+
+    def evaluate_many(self, population):
+        population = np.asarray(population)
+        _n = population.shape[1]
+        _t = np.ceil(self.t_pct * _n)
+
+        head_1 = run_lengths(population, 1)
+        tail_0 = run_lengths(population[:, ::-1], 0)
+
+        _r = np.where((tail_0 > _t) & (head_1 > _t), _n, 0)
+        return np.maximum(tail_0, head_1) + _r
+
+    def evaluate_packed(self, bits, length):
+        # Padding bits are zero, so they end the run of ones on their own and
+        # only need taking off the trailing zeros
+        _t = np.ceil(self.t_pct * length)
+        padding = 8 * bits.shape[1] - length
+
+        head_1 = packed_run_lengths(bits, 0xFF, LEADING_ONES)
+        tail_0 = packed_run_lengths(bits[:, ::-1], 0x00, TRAILING_ZEROS) - padding
+
+        _r = np.where((tail_0 > _t) & (head_1 > _t), length, 0)
+        return np.maximum(tail_0, head_1) + _r
+
+    # Incremental scoring: keep the leading run of ones and trailing run of
+    # zeros of the current state. A single change only moves a run boundary
+    # when it touches it, and only an extended run needs a rescan, which is
+    # cached until the next committed move.
+    def track(self, state):
+        self._state = np.array(state, dtype=np.int64)
+        self._length = len(self._state)
+        self._threshold = np.ceil(self.t_pct * self._length)
+        self._head = int(run_lengths(self._state[np.newaxis, :], 1)[0])
+        self._tail = int(run_lengths(self._state[np.newaxis, ::-1], 0)[0])
+        self._head_next = None
+        self._tail_next = None
+        return self._score(self._head, self._tail)
+
+    def _score(self, head_1, tail_0):
+        _r = self._length if (tail_0 > self._threshold and head_1 > self._threshold) else 0
+        return max(tail_0, head_1) + _r
+
+    def _moved_runs(self, index, value):
+        head_1 = self._head
+        if index < head_1 and value != 1:
+            head_1 = index
+        elif index == head_1 and value == 1:
+            if self._head_next is None:
+                after = self._state[np.newaxis, head_1 + 1 :]
+                self._head_next = int(run_lengths(after, 1)[0])
+            head_1 += 1 + self._head_next
+
+        tail_0 = self._tail
+        from_end = self._length - 1 - index
+        if from_end < tail_0 and value != 0:
+            tail_0 = from_end
+        elif from_end == tail_0 and value == 0:
+            if self._tail_next is None:
+                before = self._state[np.newaxis, :index][:, ::-1]
+                self._tail_next = int(run_lengths(before, 0)[0])
+            tail_0 += 1 + self._tail_next
+
+        return head_1, tail_0
+
+    def neighbor_fitness(self, index, value):
+        return self._score(*self._moved_runs(index, value))
+
+    def commit(self, index, value):
+        self._head, self._tail = self._moved_runs(index, value)
+        self._state[index] = value
+        self._head_next = None
+        self._tail_next = None
+
+
+class FastKnapsack(mh.Knapsack):
+    """Knapsack that keeps weights and values as contiguous int arrays and
+    scores whole populations with one matrix product each."""
+
+    def __init__(self, weights, values, max_weight_pct=0.35):
+        super().__init__(weights, values, max_weight_pct=max_weight_pct)
+        self.weights = np.ascontiguousarray(weights, dtype=np.int64)
+        self.values = np.ascontiguousarray(values, dtype=np.int64)
+
+    def evaluate(self, state):
+        if len(state) != len(self.weights):
+            raise Exception(
+                "The state array must be the same size as the weight and values arrays."
+            )
+        return self.evaluate_many(np.asarray(state)[np.newaxis, :])[0]
+
+    def evaluate_many(self, population):
+        population = np.asarray(population)
+        total_weight = population @ self.weights
+        total_value = population @ self.values
+        return np.where(total_weight <= self._w, total_value, 0)
+
+    def packed_tables(self, byte_count):
+        # table[j, b] is the total of the items set in byte value b at byte j
+        tables = getattr(self, "_packed_tables", None)
+        if tables is None or len(tables[0]) != byte_count:
+            tables = []
+            for item_values in [self.weights, self.values]:
+                padded = np.zeros(8 * byte_count, dtype=np.int64)
+                padded[: len(item_values)] = item_values
+                byte_totals = BYTE_BITS @ padded.reshape(byte_count, 8).T
+                tables.append(np.ascontiguousarray(byte_totals.T))
+            self._packed_tables = tables
+        return tables
+
+    def evaluate_packed(self, bits, length):
+        weight_table, value_table = self.packed_tables(bits.shape[1])
+        table_index = bits + 256 * np.arange(bits.shape[1])
+        total_weight = np.take(weight_table.ravel(), table_index).sum(axis=1)
+        total_value = np.take(value_table.ravel(), table_index).sum(axis=1)
+        return np.where(total_weight <= self._w, total_value, 0)
+
+    # Incremental scoring: keep the total weight and value of the current
+    # state so a single item change is scored in O(1)
+    def track(self, state):
+        self._state = np.array(state, dtype=np.int64)
+        self._total_weight = int(self._state @ self.weights)
+        self._total_value = int(self._state @ self.values)
+        return self._total_value if self._total_weight <= self._w else 0
+
+    def neighbor_fitness(self, index, value):
+        change = int(value) - int(self._state[index])
+        total_weight = self._total_weight + change * int(self.weights[index])
+        if total_weight > self._w:
+            return 0
+        return self._total_value + change * int(self.values[index])
+
+    def commit(self, index, value):
+        change = int(value) - int(self._state[index])
+        self._total_weight += change * int(self.weights[index])
+        self._total_value += change * int(self.values[index])
+        self._state[index] = value
+
+
+class FastMaxKColor(mh.MaxKColor):
+    """Max K Color with the edge list held as two contiguous int32 endpoint
+    arrays, so conflicts are counted as (state[u] == state[v]).sum()."""
+
+    # Upper bound on population rows x edges compared in one block
+    block_size = 2**22
+
+    def __init__(self, edges):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        start = np.minimum(edges[:, 0], edges[:, 1])
+        end = np.maximum(edges[:, 0], edges[:, 1])
+
+        # Same edge set as MaxKColor: (a, b) and (b, a) are one edge. Generated
+        # edge lists are already sorted and unique, so only sort when needed.
+        size = int(end.max()) + 1 if len(end) > 0 else 1
+        keys = start * size + end
+        if np.any(keys[1:] <= keys[:-1]):
+            keys = np.unique(keys)
+
+        self._set_endpoints(keys // size, keys % size)
+
+    @classmethod
+    def from_endpoints(cls, u, v):
+        # u and v must already be sorted unique edges with u <= v, such as a
+        # stored instance. Arrays that are int32 already, including read-only
+        # memory maps, are used without copying.
+        fitness = cls.__new__(cls)
+        fitness._set_endpoints(u, v)
+        return fitness
+
+    def _set_endpoints(self, u, v):
+        self.u = np.ascontiguousarray(u, dtype=np.int32)
+        self.v = np.ascontiguousarray(v, dtype=np.int32)
+        self.graph_edges = None
+        self.prob_type = "discrete"
+        self.adjacency_starts = None
+        self.adjacency = None
+
+    @property
+    def edges(self):
+        return list(zip(self.u.tolist(), self.v.tolist()))
+
+    def set_graph(self, graph):
+        super().set_graph(graph)
+        edges = np.asarray(self.graph_edges, dtype=np.int64).reshape(-1, 2)
+        self.u = np.ascontiguousarray(edges[:, 0], dtype=np.int32)
+        self.v = np.ascontiguousarray(edges[:, 1], dtype=np.int32)
+        self.adjacency_starts = None
+        self.adjacency = None
+
+    def build_adjacency(self, length):
+        # CSR adjacency: the neighbors of node i are
+        # adjacency[adjacency_starts[i]:adjacency_starts[i + 1]]. Self loops are
+        # left out, they are a conflict whatever color the node has.
+        not_loop = self.u != self.v
+        nodes = np.concatenate((self.u[not_loop], self.v[not_loop]))
+        neighbors = np.concatenate((self.v[not_loop], self.u[not_loop]))
+        order = np.argsort(nodes, kind="stable")
+
+        self.adjacency = np.ascontiguousarray(neighbors[order], dtype=np.int32)
+        self.adjacency_starts = np.searchsorted(nodes[order], np.arange(length + 1))
+
+    def evaluate(self, state):
+        state = np.asarray(state)
+        return int((state[self.u] == state[self.v]).sum())
+
+    def evaluate_many(self, population):
+        population = np.asarray(population)
+        rows = max(1, self.block_size // max(1, len(self.u)))
+        fitness = np.empty(len(population), dtype=np.int64)
+        for start in range(0, len(population), rows):
+            block = population[start : start + rows]
+            fitness[start : start + rows] = (block[:, self.u] == block[:, self.v]).sum(axis=1)
+        return fitness
+
+    def evaluate_packed(self, bits, length):
+        # Two colors only: a conflict is an edge whose endpoint bits match
+        u_bytes, u_masks = self.u // 8, bit_masks(self.u)
+        v_bytes, v_masks = self.v // 8, bit_masks(self.v)
+        rows = max(1, self.block_size // max(1, len(self.u)))
+        fitness = np.empty(len(bits), dtype=np.int64)
+        for start in range(0, len(bits), rows):
+            block = bits[start : start + rows]
+            u_set = (block[:, u_bytes] & u_masks) != 0
+            v_set = (block[:, v_bytes] & v_masks) != 0
+            fitness[start : start + rows] = (u_set == v_set).sum(axis=1)
+        return fitness
+
+    # Incremental scoring: recoloring one node only changes conflicts on the
+    # edges incident to it, so a move is scored in O(degree)
+    def track(self, state):
+        self._state = np.array(state, dtype=np.int64)
+        if self.adjacency_starts is None or len(self.adjacency_starts) != len(state) + 1:
+            self.build_adjacency(len(state))
+        self._conflicts = self.evaluate(self._state)
+        return self._conflicts
+
+    def _conflict_change(self, index, value):
+        neighbors = self.adjacency[self.adjacency_starts[index] : self.adjacency_starts[index + 1]]
+        colors = self._state[neighbors]
+        return int(np.count_nonzero(colors == value)) - int(
+            np.count_nonzero(colors == self._state[index])
+        )
+
+    def neighbor_fitness(self, index, value):
+        return self._conflicts + self._conflict_change(index, value)
+
+    def commit(self, index, value):
+        self._conflicts += self._conflict_change(index, value)
+        self._state[index] = value
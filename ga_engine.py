@@ -0,0 +1,234 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+from functools import partial
+
+import numpy as np
+
+from packed import IntPopulation, PackedPopulation
+from runners import FinalSaveMixin, GARunner
+
+
+def mate_probabilities(pop_fitness, maximize):
+    # Same as mlrose's eval_mate_probs, for a fitness array
+    pop_fitness = np.copy(pop_fitness)
+    pop_fitness[pop_fitness == -1.0 * np.inf] = 0
+    if maximize == -1:
+        pop_fitness -= np.min(pop_fitness)
+    if np.sum(pop_fitness) == 0:
+        return np.ones(len(pop_fitness)) / len(pop_fitness)
+    return pop_fitness / np.sum(pop_fitness)
+
+
+def population_sizes(pop_size, pop_breed_percent, elite_dreg_ratio, minimum_elites, minimum_dregs):
+    # Children bred, and elites and dregs carried over, per generation, as in
+    # genetic_alg
+    breeding_pop_size = int(pop_size * pop_breed_percent) - (minimum_elites + minimum_dregs)
+    if breeding_pop_size < 1:
+        raise Exception("""pop_breed_percent must be large enough to ensure at least one mating.""")
+
+    survivors_size = pop_size - breeding_pop_size
+    dregs_size = max(
+        int(survivors_size * (1.0 - elite_dreg_ratio)) if survivors_size > 1 else 0, minimum_dregs
+    )
+    elites_size = max(survivors_size - dregs_size, minimum_elites)
+    if dregs_size + elites_size > survivors_size:
+        over_population = dregs_size + elites_size - survivors_size
+        breeding_pop_size -= over_population
+    return breeding_pop_size, elites_size, dregs_size
+
+
+def random_population(problem, pop_size):
+    # Random rows, the first of them replaced by the problem's warm start rows
+    warm = problem.warm_rows(pop_size)
+    if problem.max_val == 2:
+        population = PackedPopulation.random(pop_size, problem.length)
+        warm = PackedPopulation.from_states(warm)
+    else:
+        population = IntPopulation.random(pop_size, problem.length, problem.max_val)
+        warm = IntPopulation(warm, problem.max_val)
+    if len(warm) == 0:
+        return population
+    return warm.concatenate(population.take(np.arange(len(warm), pop_size)))
+
+
+def population_evaluator(problem):
+    if problem.max_val == 2:
+        return problem.eval_packed_population_fitness
+    return lambda pop: problem.eval_population_fitness(pop.states)
+
+
+def next_generation(
+    population, pop_fitness, maximize, sizes, mutation_prob, crossover="uniform", mutation="swap"
+):
+    # Bred and mutated children followed by the elites and dregs of
+    # population, cut to the population size
+    breeding_pop_size, elites_size, dregs_size = sizes
+    mate_probs = mate_probabilities(pop_fitness, maximize)
+    parents = np.random.choice(len(population), size=(breeding_pop_size, 2), p=mate_probs)
+    if crossover == "uniform":
+        next_gen = population.uniform_crossover(parents[:, 0], parents[:, 1])
+    else:
+        next_gen = population.one_point_crossover(parents[:, 0], parents[:, 1])
+    if mutation == "swap":
+        next_gen.swap_mutate(mutation_prob)
+    else:
+        next_gen.flip_mutate(mutation_prob)
+
+    if elites_size + dregs_size > 0:
+        order = np.argsort(-pop_fitness, kind="stable")
+        survivors = order[:elites_size]
+        if dregs_size > 0:
+            survivors = np.concatenate((survivors, order[-dregs_size:]))
+        next_gen = next_gen.concatenate(population.take(survivors))
+
+    return next_gen.take(np.arange(min(len(next_gen), len(population))))
+
+
+def vectorized_genetic_alg(
+    problem,
+    pop_size=200,
+    pop_breed_percent=0.75,
+    elite_dreg_ratio=0.99,
+    minimum_elites=0,
+    minimum_dregs=0,
+    mutation_prob=0.1,
+    max_attempts=10,
+    max_iters=np.inf,
+    curve=False,
+    random_state=None,
+    state_fitness_callback=None,
+    callback_user_info=None,
+    crossover="uniform",
+    mutation="swap",
+):
+    """mlrose's genetic_alg with each generation built as whole-array
+    operations: parents for every child are drawn in one call, and crossover
+    and mutation work on the (pop x length) population at once.
+
+    Bit string problems keep the population bit-packed (PackedPopulation) and
+    score it with the packed fitness kernels. Survivor selection and the
+    callback, curve and FEvals bookkeeping follow genetic_alg.
+
+    crossover is "uniform" (mlrose's default) or "one_point". mutation is
+    "swap" (mlrose's default, swap two elements of a child with probability
+    mutation_prob) or "flip" (change each element with probability
+    mutation_prob).
+    """
+    if pop_size < 0:
+        raise Exception("""pop_size must be a positive integer.""")
+    elif not isinstance(pop_size, int):
+        if pop_size.is_integer():
+            pop_size = int(pop_size)
+        else:
+            raise Exception("""pop_size must be a positive integer.""")
+
+    if (elite_dreg_ratio < 0) or (elite_dreg_ratio > 1):
+        raise Exception("""elite_dreg_ratio must be between 0 and 1.""")
+
+    if (mutation_prob < 0) or (mutation_prob > 1):
+        raise Exception("""mutation_prob must be between 0 and 1.""")
+
+    if crossover not in ["uniform", "one_point"]:
+        raise Exception(f"Unsupported crossover of {crossover}")
+
+    if mutation not in ["swap", "flip"]:
+        raise Exception(f"Unsupported mutation of {mutation}")
+
+    sizes = population_sizes(
+        pop_size, pop_breed_percent, elite_dreg_ratio, minimum_elites, minimum_dregs
+    )
+
+    if isinstance(random_state, int) and random_state > 0:
+        np.random.seed(random_state)
+
+    fitness_curve = []
+
+    problem.reset()
+    evaluate = population_evaluator(problem)
+    if problem.resumed_population():
+        population, pop_fitness = problem.engine_population
+    else:
+        population = random_population(problem, pop_size)
+        pop_fitness = evaluate(population)
+        problem.engine_population = (population, pop_fitness)
+
+    if state_fitness_callback is not None:
+        state_fitness_callback(
+            iteration=0,
+            state=problem.get_state(),
+            fitness=problem.get_adjusted_fitness(),
+            fitness_evaluations=problem.fitness_evaluations,
+            user_data=callback_user_info,
+        )
+
+    attempts = 0
+    iters = 0
+
+    continue_iterating = True
+    while (attempts < max_attempts) and (iters < max_iters):
+        iters += 1
+        problem.current_iteration += 1
+
+        population = next_generation(
+            population, pop_fitness, problem.maximize, sizes, mutation_prob, crossover, mutation
+        )
+        pop_fitness = evaluate(population)
+        problem.engine_population = (population, pop_fitness)
+
+        next_state = population.unpack([np.argmax(pop_fitness)])[0].astype(np.int64)
+        next_fitness = problem.eval_fitness(next_state)
+
+        current_fitness = problem.get_fitness()
+        if next_fitness > current_fitness:
+            problem.set_state(next_state)
+            attempts = 0
+        else:
+            attempts += 1
+
+        if curve:
+            fitness_curve.append((problem.get_adjusted_fitness(), problem.fitness_evaluations))
+
+        if state_fitness_callback is not None:
+            max_attempts_reached = (
+                (attempts == max_attempts) or (iters == max_iters) or problem.can_stop()
+            )
+            continue_iterating = state_fitness_callback(
+                iteration=iters,
+                attempt=attempts + 1,
+                done=max_attempts_reached,
+                state=problem.get_state(),
+                fitness=problem.get_adjusted_fitness(),
+                fitness_evaluations=problem.fitness_evaluations,
+                curve=np.asarray(fitness_curve) if curve else None,
+                user_data=callback_user_info,
+            )
+
+        if not continue_iterating:
+            break
+
+    best_fitness = problem.get_maximize() * problem.get_fitness()
+    best_state = problem.get_state()
+    return best_state, best_fitness, np.asarray(fitness_curve) if curve else None
+
+
+class VectorizedGARunner(FinalSaveMixin, GARunner):
+    """GARunner running vectorized_genetic_alg over the population size x
+    mutation rate grid, with the same run_stats and curves columns."""
+
+    def __init__(self, *args, crossover="uniform", mutation="swap", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.crossover = crossover
+        self.mutation = mutation
+
+    def run(self):
+        algorithm = partial(
+            vectorized_genetic_alg, crossover=self.crossover, mutation=self.mutation
+        )
+        return self.run_experiment_(
+            algorithm=algorithm,
+            pop_size=("Population Size", self.population_sizes),
+            mutation_prob=("Mutation Rate", self.mutation_rates),
+        )
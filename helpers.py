@@ -1,7 +1,10 @@
 import json
+import multiprocessing
 import os
+import re
 from datetime import datetime
 from importlib import import_module
+from multiprocessing.pool import Pool
 from pathlib import Path
 
 
@@ -78,9 +81,72 @@ def get_filedir(title, location):
     return directory
 
 
+def get_latest_filedir(title, location):
+    """Returns the newest directory get_filedir created for the title, or a new
+    one when there is none.
+    """
+    pattern = re.compile(rf"{re.escape(title_to_filename(title, None))}(_\d\d){{5}}")
+    file_dirs = sorted(
+        d for d in os.listdir(location) if pattern.fullmatch(d) and os.path.isdir(f"{location}/{d}")
+    )
+    if len(file_dirs) == 0:
+        return get_filedir(title, location)
+    return f"{location}/{file_dirs[-1]}"
+
+
 def import_item_from_module_file(module_filename, module_item):
     must_exist(module_filename)
     module = module_filename.replace("/", ".")
     module = module.replace(".py", "")
     module = import_module(module)
     return getattr(module, module_item)
+
+
+class NonDaemonProcess(multiprocessing.get_context().Process):
+    @property
+    def daemon(self):
+        return False
+
+    @daemon.setter
+    def daemon(self, value):
+        pass
+
+
+class NonDaemonContext(type(multiprocessing.get_context())):
+    Process = NonDaemonProcess
+
+
+class NestablePool(Pool):
+    """Pool whose workers are not daemons, so a job worker can start a pool of
+    its own to spread one algorithm's work over more processes."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs["context"] = NonDaemonContext()
+        super().__init__(*args, **kwargs)
+
+
+# Processes of the NestablePool that runs a job's tasks
+JOB_WORKERS = 8
+
+
+def default_workers():
+    # An engine's share of the CPUs when every job worker starts its own
+    # processes
+    return max(1, os.cpu_count() // JOB_WORKERS)
+
+
+def can_start_workers(workers):
+    """True when workers processes are wanted and this process can start them.
+
+    The processes of a daemonic pool, such as multiprocessing.Pool's, cannot
+    start processes of their own, so engines run their work in turn in one
+    process there, with the same results. NestablePool workers are not
+    daemons. A request for more than one worker that cannot be met is printed,
+    so the setting is not ignored silently.
+    """
+    if workers is None or workers <= 1:
+        return False
+    if multiprocessing.current_process().daemon:
+        print(f"    {workers} workers ignored in a daemonic process, running in this one")
+        return False
+    return True
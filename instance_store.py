@@ -0,0 +1,120 @@
+import hashlib
+import os
+import struct
+import zipfile
+
+import numpy as np
+import numpy.lib.format as npy_format
+
+
+def instance_digest(arrays):
+    # SHA-1 over every array's name, dtype, shape and bytes, in name order
+    digest = hashlib.sha1()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def memmap_npz(path):
+    """Memory-map every array of an uncompressed .npz file.
+
+    np.load ignores mmap_mode for .npz archives, but np.savez stores each
+    member uncompressed, so the array data sits at a fixed offset in the file.
+    """
+    with zipfile.ZipFile(path) as archive:
+        members = archive.infolist()
+
+    arrays = {}
+    with open(path, "rb") as npz_file:
+        for member in members:
+            if member.compress_type != zipfile.ZIP_STORED:
+                raise Exception(f"{path} is compressed and cannot be memory-mapped")
+
+            # Local file header: 30 fixed bytes, then the file name and extra field
+            npz_file.seek(member.header_offset)
+            name_length, extra_length = struct.unpack("<HH", npz_file.read(30)[26:30])
+            npz_file.seek(member.header_offset + 30 + name_length + extra_length)
+
+            version = npy_format.read_magic(npz_file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = npy_format.read_array_header_1_0(npz_file)
+            else:
+                shape, fortran_order, dtype = npy_format.read_array_header_2_0(npz_file)
+
+            name = member.filename[: -len(".npy")]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=npz_file.tell(),
+                shape=shape,
+                order="F" if fortran_order else "C",
+            )
+    return arrays
+
+
+class ProblemInstance(dict):
+    """Arrays of a stored problem instance, with the file they came from."""
+
+    def __init__(self, arrays, path, digest):
+        super().__init__(arrays)
+        self.path = path
+        self.digest = digest
+
+    def info(self):
+        return {"path": self.path, "digest": self.digest}
+
+
+class InstanceStore:
+    """Generated problem instances saved once as .npz files and memory-mapped
+    on every later use, keyed by problem type, length, seed and generator
+    parameters.
+
+    Files are written under a temporary name and renamed into place, so pool
+    workers building the same instance at once never see a partial file.
+    """
+
+    def __init__(self, directory="instances"):
+        self.directory = directory
+
+    def path(self, problem_type, length, seed, **parameters):
+        key = [problem_type, f"length_{length}", f"seed_{seed}"]
+        key += [f"{name}_{value}" for name, value in sorted(parameters.items())]
+        return f"{self.directory}/{'__'.join(key)}.npz"
+
+    def get(self, problem_type, length, seed, build, **parameters):
+        # build() is only called when the instance is not stored yet
+        path = self.path(problem_type, length, seed, **parameters)
+        if not os.path.exists(path):
+            self.save(path, build())
+        return self.load(path)
+
+    def save(self, path, arrays):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path[: -len('.npz')]}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, digest=np.array(instance_digest(arrays)), **arrays)
+        os.replace(temp_path, path)
+
+    def get_value(self, path, name, compute):
+        # Number derived from the instance stored at path, such as its optimum,
+        # saved next to it the first time compute() is called. None, when
+        # compute() cannot tell, is not saved.
+        value_path = f"{path[: -len('.npz')]}__{name}.npy"
+        if not os.path.exists(value_path):
+            value = compute()
+            if value is None:
+                return None
+            temp_path = f"{value_path[: -len('.npy')]}.{os.getpid()}.tmp.npy"
+            np.save(temp_path, np.array(value))
+            os.replace(temp_path, value_path)
+        return np.load(value_path)[()].item()
+
+    def load(self, path):
+        arrays = memmap_npz(path)
+        digest = str(arrays.pop("digest")[()])
+        return ProblemInstance(arrays, path, digest)
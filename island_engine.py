@@ -0,0 +1,447 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import copy
+import multiprocessing
+from threading import BrokenBarrierError
+from time import perf_counter
+
+import numpy as np
+from mlrose_hiive.decorators import short_name
+
+from ga_engine import next_generation, population_evaluator, population_sizes, random_population
+from helpers import can_start_workers
+from packed import IntPopulation, PackedPopulation
+from rhc_engine import restart_seed
+from runners import FinalSaveMixin, GARunner, recorded_iterations
+
+TOPOLOGIES = ["ring", "all"]
+
+
+def population_from_states(problem, states):
+    if problem.max_val == 2:
+        return PackedPopulation.from_states(states)
+    return IntPopulation(states, problem.max_val)
+
+
+class Island:
+    """One subpopulation evolved with the vectorized GA generation, with its
+    own copy of the problem and its own numpy random state, so it evolves the
+    same in a worker process of its own as it does taking turns with the
+    other islands in one process."""
+
+    def __init__(
+        self,
+        problem,
+        pop_size,
+        mutation_prob,
+        seed,
+        start_time,
+        crossover="uniform",
+        mutation="swap",
+    ):
+        self.problem = problem
+        self.mutation_prob = mutation_prob
+        self.crossover = crossover
+        self.mutation = mutation
+        # Breeding and survivor sizes for genetic_alg's default settings
+        self.sizes = population_sizes(pop_size, 0.75, 0.99, 0, 0)
+        self.start_time = start_time
+
+        np.random.seed(seed)
+        problem.reset()
+        self.population = random_population(problem, pop_size)
+        self.pop_fitness = population_evaluator(problem)(self.population)
+        self.random_state = np.random.get_state()
+
+        self.iteration = 0
+        self.stopped = False
+        self.fitness = [problem.get_fitness()]
+        self.fevals = [problem.fitness_evaluations]
+        self.times = [perf_counter() - start_time]
+        self.states = {0: problem.get_state().copy()}
+
+    def evolve(self, until, iteration_list):
+        # The generations of vectorized_genetic_alg. The problem state is the
+        # best individual found so far.
+        problem = self.problem
+        evaluate = population_evaluator(problem)
+        np.random.set_state(self.random_state)
+        while self.iteration < until and not self.stopped:
+            self.iteration += 1
+            problem.current_iteration += 1
+
+            self.population = next_generation(
+                self.population,
+                self.pop_fitness,
+                problem.maximize,
+                self.sizes,
+                self.mutation_prob,
+                self.crossover,
+                self.mutation,
+            )
+            self.pop_fitness = evaluate(self.population)
+            best = np.argmax(self.pop_fitness)
+            if self.pop_fitness[best] > problem.get_fitness():
+                problem.set_state(self.population.unpack([best])[0].astype(np.int64))
+
+            self.fitness.append(problem.get_fitness())
+            self.fevals.append(problem.fitness_evaluations)
+            self.times.append(perf_counter() - self.start_time)
+            self.stopped = problem.can_stop()
+            if self.iteration in iteration_list:
+                self.states[self.iteration] = problem.get_state().copy()
+        self.random_state = np.random.get_state()
+
+    def emigrants(self, migrants):
+        rows = np.argsort(-self.pop_fitness, kind="stable")[:migrants]
+        return self.population.unpack(rows), self.pop_fitness[rows]
+
+    def immigrate(self, states, fitness):
+        # Migrants take the places of the worst individuals, with the fitness
+        # their own island found for them
+        keep = np.argsort(-self.pop_fitness, kind="stable")[: len(self.population) - len(states)]
+        self.population = self.population.take(keep).concatenate(
+            population_from_states(self.problem, states)
+        )
+        self.pop_fitness = np.concatenate((self.pop_fitness[keep], fitness))
+
+    def trace(self):
+        self.states[self.iteration] = self.problem.get_state().copy()
+        return {
+            "fitness": np.array(self.fitness, dtype=float),
+            "fevals": np.array(self.fevals, dtype=np.int64),
+            "time": np.array(self.times),
+            "states": self.states,
+        }
+
+
+class Archipelago:
+    """Migration and stop decisions between rounds of migration_interval
+    generations.
+
+    With the ring topology each island receives the top migrants of the
+    island before it. With all, each island receives the top migrants of all
+    the other islands' emigrants together.
+    """
+
+    def __init__(self, islands, topology, migrants, max_attempts, max_iters, migration_interval):
+        self.islands = islands
+        self.topology = topology
+        self.migrants = migrants
+        self.max_attempts = max_attempts
+        self.max_iters = max_iters
+        self.migration_interval = migration_interval
+        self.best_fitness = -np.inf
+        self.attempts = 0
+
+    def round_end(self, round_number):
+        return min((round_number + 1) * self.migration_interval, self.max_iters)
+
+    def migrate(self, round_number, out_states, out_fitness, in_states, in_fitness, best, stopped):
+        # Fills in_states and in_fitness from the emigrants of every island.
+        # Returns whether the run is over.
+        if best.max() > self.best_fitness:
+            self.best_fitness = best.max()
+            self.attempts = 0
+        else:
+            self.attempts += self.round_end(round_number) - self.round_end(round_number - 1)
+        stop = bool(
+            stopped.any()
+            or (self.round_end(round_number) >= self.max_iters)
+            or (self.attempts >= self.max_attempts)
+        )
+        if stop or self.migrants == 0:
+            return stop
+
+        for island in range(self.islands):
+            if self.topology == "ring":
+                source = (island - 1) % self.islands
+                in_states[island] = out_states[source]
+                in_fitness[island] = out_fitness[source]
+            else:
+                sources = [i for i in range(self.islands) if i != island]
+                states = out_states[sources].reshape(-1, out_states.shape[2])
+                fitness = out_fitness[sources].reshape(-1)
+                rows = np.argsort(-fitness, kind="stable")[: self.migrants]
+                in_states[island] = states[rows]
+                in_fitness[island] = fitness[rows]
+        return stop
+
+
+def _shared_arrays(shared, islands, migrants, length):
+    return (
+        np.frombuffer(shared["out_states"], dtype=np.int64).reshape(islands, migrants, length),
+        np.frombuffer(shared["out_fitness"], dtype=np.float64).reshape(islands, migrants),
+        np.frombuffer(shared["in_states"], dtype=np.int64).reshape(islands, migrants, length),
+        np.frombuffer(shared["in_fitness"], dtype=np.float64).reshape(islands, migrants),
+        np.frombuffer(shared["best"], dtype=np.float64),
+        np.frombuffer(shared["stopped"], dtype=np.int8),
+    )
+
+
+def _publish(island, index, migrants, out_states, out_fitness, best, stopped):
+    out_states[index], out_fitness[index] = island.emigrants(migrants)
+    best[index] = island.problem.get_fitness()
+    stopped[index] = island.stopped
+
+
+def _island_worker(island, index, archipelago, iteration_list, shared, barrier, results):
+    migrants = archipelago.migrants
+    out_states, out_fitness, in_states, in_fitness, best, stopped = _shared_arrays(
+        shared, archipelago.islands, migrants, island.problem.length
+    )
+    try:
+        round_number = 0
+        while True:
+            island.evolve(archipelago.round_end(round_number), iteration_list)
+            _publish(island, index, migrants, out_states, out_fitness, best, stopped)
+            # The parent picks every island's migrants between the two waits
+            barrier.wait()
+            barrier.wait()
+            if shared["stop"].value:
+                break
+            if migrants > 0:
+                island.immigrate(in_states[index].copy(), in_fitness[index].copy())
+            round_number += 1
+    except BrokenBarrierError:
+        return
+    except BaseException:
+        barrier.abort()
+        raise
+    results.put((index, island.trace()))
+
+
+@short_name("island_ga")
+class IslandGARunner(FinalSaveMixin, GARunner):
+    """Island-model GA over the population size x mutation rate grid.
+
+    Each population is split evenly between islands, and each island evolves
+    with the vectorized GA generation in a worker process of its own. Every
+    migration_interval generations the islands stop at a barrier, copy their
+    top migrants into shared memory, and take in migrants over the topology
+    in place of their worst individuals. Migrants keep the fitness found for
+    them, so they are not scored again.
+
+    Migrations are decided in the parent process, and every island draws
+    from its own stream seeded from (seed, island), so the results do not
+    depend on process scheduling. When worker processes cannot be started,
+    the islands take turns in one process with the same results.
+
+    A run stops after max_iters generations, once the best fitness of all
+    islands has not improved for max_attempts generations, or when any island
+    reaches problem.can_stop(). The run_stats and curves files have the same
+    columns as the GA runner: Fitness and State are those of the best island,
+    FEvals count the evaluations of every island, and Time is the wall time
+    since the islands started.
+    """
+
+    def __init__(
+        self,
+        *args,
+        islands=4,
+        migration_interval=10,
+        migrants=2,
+        topology="ring",
+        crossover="uniform",
+        mutation="swap",
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        if islands < 1:
+            raise Exception("""islands must be a positive integer.""")
+        if migration_interval < 1:
+            raise Exception("""migration_interval must be a positive integer.""")
+        if migrants < 0:
+            raise Exception("""migrants must be zero or a positive integer.""")
+        if topology not in TOPOLOGIES:
+            raise Exception(f"Unsupported migration topology of {topology}")
+        if migrants >= min(self.population_sizes) // islands:
+            raise Exception("""migrants must be fewer than the population of an island.""")
+
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.topology = topology
+        self.crossover = crossover
+        self.mutation = mutation
+
+    def run(self):
+        self._setup()
+        max_iters = int(max(self.iteration_list))
+        self.parameter_description_dict = {
+            "pop_size": "Population Size",
+            "mutation_prob": "Mutation Rate",
+        }
+
+        for pop_size in self.population_sizes:
+            for mutation_rate in self.mutation_rates:
+                self._start_run_timing()
+                # The first islands take one each of the individuals left over
+                sizes = [len(rows) for rows in np.array_split(range(int(pop_size)), self.islands)]
+                islands = [
+                    Island(
+                        self._island_problem(),
+                        sizes[index],
+                        mutation_rate,
+                        restart_seed(self.seed, index),
+                        self._run_start_time,
+                        self.crossover,
+                        self.mutation,
+                    )
+                    for index in range(self.islands)
+                ]
+                archipelago = Archipelago(
+                    self.islands,
+                    self.topology,
+                    self.migrants,
+                    self.max_attempts,
+                    max_iters,
+                    self.migration_interval,
+                )
+
+                if can_start_workers(len(islands)):
+                    traces = self._run_in_processes(islands, archipelago)
+                else:
+                    traces = self._run_in_turn(islands, archipelago)
+                self._add_rows(
+                    traces,
+                    {"Population Size": pop_size, "Mutation Rate": mutation_rate},
+                    max_iters,
+                )
+
+        self._create_and_save_run_data_frames(final_save=True)
+        self._tear_down()
+        return self.run_stats_df, self.curves_df
+
+    def _island_problem(self):
+        problem = copy.deepcopy(self.problem)
+        # An evaluation budget is shared out between the islands
+        if getattr(problem, "budget_fevals", None) is not None:
+            problem.budget_fevals = int(np.ceil(problem.budget_fevals / self.islands))
+        return problem
+
+    def _run_in_turn(self, islands, archipelago):
+        length = self.problem.length
+        out_states = np.zeros((len(islands), self.migrants, length), dtype=np.int64)
+        out_fitness = np.zeros((len(islands), self.migrants))
+        in_states, in_fitness = np.zeros_like(out_states), np.zeros_like(out_fitness)
+        best, stopped = np.zeros(len(islands)), np.zeros(len(islands), dtype=np.int8)
+
+        round_number = 0
+        while True:
+            for index, island in enumerate(islands):
+                island.evolve(archipelago.round_end(round_number), self.iteration_list)
+                _publish(island, index, self.migrants, out_states, out_fitness, best, stopped)
+            stop = archipelago.migrate(
+                round_number, out_states, out_fitness, in_states, in_fitness, best, stopped
+            )
+            if stop:
+                break
+            if self.migrants > 0:
+                for index, island in enumerate(islands):
+                    island.immigrate(in_states[index].copy(), in_fitness[index].copy())
+            round_number += 1
+        return [island.trace() for island in islands]
+
+    def _run_in_processes(self, islands, archipelago):
+        length = self.problem.length
+        slots = len(islands) * self.migrants
+        shared = {
+            "out_states": multiprocessing.RawArray("q", slots * length),
+            "out_fitness": multiprocessing.RawArray("d", slots),
+            "in_states": multiprocessing.RawArray("q", slots * length),
+            "in_fitness": multiprocessing.RawArray("d", slots),
+            "best": multiprocessing.RawArray("d", len(islands)),
+            "stopped": multiprocessing.RawArray("b", len(islands)),
+            "stop": multiprocessing.RawValue("b", 0),
+        }
+        out_states, out_fitness, in_states, in_fitness, best, stopped = _shared_arrays(
+            shared, len(islands), self.migrants, length
+        )
+        barrier = multiprocessing.Barrier(len(islands) + 1)
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=_island_worker,
+                args=(island, index, archipelago, self.iteration_list, shared, barrier, results),
+                daemon=True,
+            )
+            for index, island in enumerate(islands)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            round_number = 0
+            while True:
+                barrier.wait()
+                stop = archipelago.migrate(
+                    round_number, out_states, out_fitness, in_states, in_fitness, best, stopped
+                )
+                shared["stop"].value = stop
+                barrier.wait()
+                if stop:
+                    break
+                round_number += 1
+        except BrokenBarrierError:
+            for worker in workers:
+                worker.join()
+            raise Exception("""An island GA worker failed.""")
+
+        traces = [None] * len(islands)
+        for _ in islands:
+            index, trace = results.get()
+            traces[index] = trace
+        for worker in workers:
+            worker.join()
+        return traces
+
+    def _add_rows(self, traces, labels, max_iters):
+        # Islands that stopped early hold their last values to the end
+        iterations = max(len(trace["fitness"]) for trace in traces)
+        pad = lambda values: np.pad(values, (0, iterations - len(values)), mode="edge")
+        fitness = np.array([pad(trace["fitness"]) for trace in traces])
+        fevals = sum(pad(trace["fevals"]) for trace in traces)
+        times = np.array([pad(trace["time"]) for trace in traces]).max(axis=0)
+        best_islands = np.argmax(fitness, axis=0)
+        maximize = self.problem.maximize
+
+        last_iteration = iterations - 1
+        labels = dict(labels, max_iters=max_iters)
+        for iteration in range(iterations):
+            best_fitness = maximize * fitness[best_islands[iteration], iteration]
+            done = iteration > 0 and iteration == last_iteration
+            rows = recorded_iterations(self.iteration_list, iteration, done)
+            if len(rows) > 0:
+                trace = traces[best_islands[iteration]]
+                state = trace["states"].get(iteration, trace["states"][len(trace["fitness"]) - 1])
+            for i in rows:
+                run_stat = {
+                    "Iteration": i,
+                    "Fitness": best_fitness,
+                    "FEvals": fevals[iteration],
+                    "Time": times[iteration],
+                    "State": self._sanitize_value(state),
+                }
+                run_stat.update(labels)
+                self._raw_run_stats.append(run_stat)
+
+            curve_stat = {
+                "Iteration": iteration,
+                "Time": times[iteration],
+                "Fitness": best_fitness,
+                "FEvals": float(fevals[iteration]),
+            }
+            curve_stat.update(labels)
+            self._fitness_curves.append(curve_stat)
+
+    def info(self):
+        return {
+            "islands": self.islands,
+            "topology": self.topology,
+            "migration_interval": self.migration_interval,
+            "migrants": self.migrants,
+        }
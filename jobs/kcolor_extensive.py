@@ -30,6 +30,7 @@ job = {
                     "seed": 1,
                     "populations": [100, 200, 400, 800, 1600],
                     "keep_percents": [0.05, 0.1, 0.2],
+                    "engine": "fast",
                 },
             }
         },
@@ -61,6 +62,7 @@ job = {
                     "seed": 1,
                     "populations": [100, 200, 400, 800, 1600],
                     "keep_percents": [0.05, 0.1, 0.2],
+                    "engine": "fast",
                 },
             }
         },
@@ -92,6 +94,7 @@ job = {
                     "seed": 1,
                     "populations": [100, 200, 400, 800, 1600],
                     "keep_percents": [0.05, 0.1, 0.2],
+                    "engine": "fast",
                 },
             }
         },
@@ -0,0 +1,331 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import multiprocessing
+from functools import partial
+from multiprocessing.pool import Pool
+
+import numpy as np
+
+from helpers import can_start_workers
+from packed import PackedPopulation
+from runners import FinalSaveMixin, MIMICRunner
+
+
+def top_samples(population, pop_fitness, keep_pct):
+    # Rows scoring at least the (1 - keep_pct) percentile, like mlrose's
+    # find_top_pct. The percentile is interpolated from the two order
+    # statistics around it, found with a partial sort instead of a full one.
+    # A PackedPopulation gives its kept rows unpacked.
+    position = (len(pop_fitness) - 1) * (1 - keep_pct)
+    lower, upper = int(np.floor(position)), int(np.ceil(position))
+    ordered = np.partition(pop_fitness, [lower, upper])
+    theta = ordered[lower] + (position - lower) * (ordered[upper] - ordered[lower])
+    if isinstance(population, PackedPopulation):
+        return population.unpack(pop_fitness >= theta).astype(np.int64)
+    return population[pop_fitness >= theta]
+
+
+def joint_counts(sample, max_val):
+    # counts[i, a, j, b] is the number of rows with sample[:, i] == a and
+    # sample[:, j] == b, for every pair of elements from one matrix product.
+    # float32 holds counts exactly up to 2**24 rows.
+    length = sample.shape[1]
+    one_hot = (sample[:, :, np.newaxis] == np.arange(max_val)).reshape(len(sample), -1)
+    one_hot = one_hot.astype(np.float32)
+    counts = (one_hot.T @ one_hot).astype(np.float64)
+    return counts.reshape(length, max_val, length, max_val)
+
+
+def mutual_information(counts, sample_size):
+    # sum_ab c_ab log(c_ab m / (c_a c_b)) / m, expanded so only the joint
+    # counts need an elementwise log
+    length, max_val = counts.shape[:2]
+    marginals = counts[np.arange(length), :, np.arange(length), :]
+    marginals = marginals[:, np.arange(max_val), np.arange(max_val)]
+    # Counts are whole numbers, so c log max(c, 1) is c log c with 0 log 0 = 0
+    joint_terms = np.einsum("iajb->ij", counts * np.log(np.maximum(counts, 1)))
+    marginal_terms = (marginals * np.log(np.maximum(marginals, 1))).sum(axis=1)
+    return (
+        joint_terms
+        + sample_size * np.log(sample_size)
+        - marginal_terms[:, np.newaxis]
+        - marginal_terms[np.newaxis, :]
+    ) / sample_size
+
+
+def maximum_spanning_tree(weights):
+    # Dense Prim's algorithm rooted at node 0. Returns each node's parent and
+    # the order nodes joined the tree, which lists every parent before its
+    # children and so is a valid sampling order.
+    length = len(weights)
+    parent = np.zeros(length, dtype=np.int64)
+    best = weights[0].astype(np.float64)
+    in_tree = np.zeros(length, dtype=bool)
+    in_tree[0] = True
+    order = [0]
+    for _ in range(length - 1):
+        node = int(np.argmax(np.where(in_tree, -np.inf, best)))
+        order.append(node)
+        in_tree[node] = True
+        closer = ~in_tree & (weights[node] > best)
+        best[closer] = weights[node][closer]
+        parent[closer] = node
+    return parent, np.array(order)
+
+
+def conditional_probabilities(counts, parent, noise=0.0):
+    # probs[i, a, b] = P(element i = b | its parent = a). The root uses its
+    # marginal for every a, and unseen parent values give a uniform row.
+    length, max_val = counts.shape[:2]
+    nodes = np.arange(length)
+    pair_counts = counts[parent, :, nodes, :]
+    pair_counts[0] = counts[0, np.arange(max_val), 0, np.arange(max_val)][np.newaxis, :]
+
+    totals = pair_counts.sum(axis=2, keepdims=True)
+    seen = totals > 0
+    probs = np.where(seen, pair_counts / np.where(seen, totals, 1), 1 / max_val)
+    if noise > 0:
+        noisy = np.where(seen, probs + noise, probs)
+        probs = noisy / noisy.sum(axis=2, keepdims=True)
+    return probs
+
+
+def sample_tree(probs, parent, order, sample_size):
+    # Inverse CDF sampling of every row at once, one node at a time in tree
+    # order: each row's uniform draw is looked up in the cumulative
+    # probabilities for its parent's value
+    cdf = np.cumsum(probs, axis=2)
+    cdf[:, :, -1] = 1.0
+    uniforms = np.random.uniform(size=(sample_size, len(parent)))
+    sample = np.zeros((sample_size, len(parent)), dtype=np.int64)
+    root = order[0]
+    sample[:, root] = (uniforms[:, root, np.newaxis] >= cdf[root, 0]).sum(axis=1)
+    for node in order[1:]:
+        row_cdf = cdf[node, sample[:, parent[node]]]
+        sample[:, node] = (uniforms[:, node, np.newaxis] >= row_cdf).sum(axis=1)
+    return sample
+
+
+_shard = {}
+
+
+def _init_shard_worker(fitness_fn, states, fitness, length):
+    _shard["fitness_fn"] = fitness_fn
+    _shard["states"] = np.frombuffer(states, dtype=np.int64).reshape(-1, length)
+    _shard["fitness"] = np.frombuffer(fitness, dtype=np.float64)
+
+
+def _score_shard(bounds):
+    start, stop = bounds
+    _shard["fitness"][start:stop] = _shard["fitness_fn"].evaluate_many(_shard["states"][start:stop])
+
+
+class ShardedScorer:
+    """evaluate_many for populations of up to pop_size rows, split into one
+    shard per worker of a process pool. The rows and their fitness pass
+    through shared memory, so only the shard bounds are sent to the pool."""
+
+    def __init__(self, fitness_fn, pop_size, length, workers):
+        self.length = length
+        self.workers = workers
+        self._states = multiprocessing.RawArray("q", pop_size * length)
+        self._fitness = multiprocessing.RawArray("d", pop_size)
+        self.states = np.frombuffer(self._states, dtype=np.int64).reshape(pop_size, length)
+        self.fitness = np.frombuffer(self._fitness, dtype=np.float64)
+        self.pool = Pool(
+            workers,
+            initializer=_init_shard_worker,
+            initargs=(fitness_fn, self._states, self._fitness, length),
+        )
+
+    def evaluate_many(self, population):
+        rows = len(population)
+        self.states[:rows] = population
+        bounds = np.linspace(0, rows, self.workers + 1).astype(int)
+        self.pool.map(_score_shard, list(zip(bounds[:-1], bounds[1:])))
+        return self.fitness[:rows].copy()
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def fast_mimic(
+    problem,
+    pop_size=200,
+    keep_pct=0.2,
+    max_attempts=10,
+    max_iters=np.inf,
+    curve=False,
+    random_state=None,
+    state_fitness_callback=None,
+    callback_user_info=None,
+    noise=0.0,
+    workers=None,
+):
+    """mlrose's mimic with the dependency tree built from whole-array
+    operations: the kept samples are picked with a partial sort, all pairwise
+    joint counts come from one one-hot matrix product, the maximum spanning
+    tree is built with dense Prim's algorithm, the conditional probabilities
+    are read straight off the joint counts, and each new population is drawn
+    node by node with inverse CDF sampling.
+
+    Bit string populations are kept bit-packed (PackedPopulation) between
+    generations and scored with the packed fitness kernels, so only the kept
+    samples are unpacked for the model. With workers above 1, and a process
+    that can_start_workers, each new population is instead scored in that
+    many processes with a ShardedScorer, which shares int rows with them. Scores, the fitness cache
+    and FEvals are the same either way.
+
+    The callback, curve and FEvals bookkeeping follow mimic.
+    """
+    if problem.get_prob_type() == "continuous":
+        raise Exception("""problem type must be discrete or tsp.""")
+
+    if pop_size < 0:
+        raise Exception("""pop_size must be a positive integer.""")
+    elif not isinstance(pop_size, int):
+        if pop_size.is_integer():
+            pop_size = int(pop_size)
+        else:
+            raise Exception("""pop_size must be a positive integer.""")
+
+    if (keep_pct < 0) or (keep_pct > 1):
+        raise Exception("""keep_pct must be between 0 and 1.""")
+
+    if (noise < 0) or (noise > 0.1):
+        raise Exception("""noise must be between 0 and 0.1.""")
+
+    if isinstance(random_state, int) and random_state > 0:
+        np.random.seed(random_state)
+
+    scorer = None
+    if can_start_workers(workers):
+        if not hasattr(problem.fitness_fn, "evaluate_many"):
+            raise Exception("""Sharded scoring needs a fitness function with evaluate_many.""")
+        scorer = ShardedScorer(problem.fitness_fn, pop_size, problem.length, workers)
+    try:
+        return _fast_mimic_loop(
+            problem,
+            pop_size,
+            keep_pct,
+            max_attempts,
+            max_iters,
+            curve,
+            state_fitness_callback,
+            callback_user_info,
+            noise,
+            scorer,
+        )
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+
+def _fast_mimic_loop(
+    problem,
+    pop_size,
+    keep_pct,
+    max_attempts,
+    max_iters,
+    curve,
+    state_fitness_callback,
+    callback_user_info,
+    noise,
+    scorer,
+):
+    fitness_curve = []
+
+    problem.reset()
+    problem.random_pop(pop_size)
+    packed = problem.max_val == 2 and scorer is None
+    # A resumed population is packed already
+    if packed and not isinstance(problem.population, PackedPopulation):
+        problem.population = PackedPopulation.from_states(problem.population)
+
+    if state_fitness_callback is not None:
+        state_fitness_callback(
+            iteration=0,
+            state=problem.get_state(),
+            fitness=problem.get_adjusted_fitness(),
+            fitness_evaluations=problem.fitness_evaluations,
+            user_data=callback_user_info,
+        )
+
+    attempts = 0
+    iters = 0
+
+    continue_iterating = True
+    while (attempts < max_attempts) and (iters < max_iters):
+        iters += 1
+        problem.current_iteration += 1
+
+        keep_sample = top_samples(problem.get_population(), problem.get_pop_fitness(), keep_pct)
+        counts = joint_counts(keep_sample, problem.max_val)
+        parent, order = maximum_spanning_tree(mutual_information(counts, len(keep_sample)))
+        probs = conditional_probabilities(counts, parent, noise)
+
+        sample = sample_tree(probs, parent, order, pop_size)
+        if packed:
+            population = PackedPopulation.from_states(sample)
+            problem.population = population
+            problem.pop_fitness = problem.eval_packed_population_fitness(population)
+            best = np.argmax(problem.pop_fitness)
+            next_state = population.unpack([best])[0].astype(np.int64)
+        else:
+            if scorer is None:
+                problem.set_population(sample)
+            else:
+                problem.set_population(sample, evaluate_many=scorer.evaluate_many)
+            next_state = problem.best_child()
+        next_fitness = problem.eval_fitness(next_state)
+
+        current_fitness = problem.get_fitness()
+        if next_fitness > current_fitness:
+            problem.set_state(next_state)
+            attempts = 0
+        else:
+            attempts += 1
+
+        if curve:
+            fitness_curve.append((problem.get_adjusted_fitness(), problem.fitness_evaluations))
+
+        if state_fitness_callback is not None:
+            max_attempts_reached = (
+                (attempts == max_attempts) or (iters == max_iters) or problem.can_stop()
+            )
+            continue_iterating = state_fitness_callback(
+                iteration=iters,
+                attempt=attempts + 1,
+                done=max_attempts_reached,
+                state=problem.get_state(),
+                fitness=problem.get_adjusted_fitness(),
+                fitness_evaluations=problem.fitness_evaluations,
+                curve=np.asarray(fitness_curve) if curve else None,
+                user_data=callback_user_info,
+            )
+        if not continue_iterating:
+            break
+
+    best_fitness = problem.get_maximize() * problem.get_fitness()
+    best_state = problem.get_state().astype(int)
+    return best_state, best_fitness, np.asarray(fitness_curve) if curve else None
+
+
+class FastMIMICRunner(FinalSaveMixin, MIMICRunner):
+    """MIMICRunner running fast_mimic over the population size x keep percent
+    grid, with the same run_stats and curves columns."""
+
+    def __init__(self, *args, workers=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workers = workers
+
+    def run(self):
+        return self.run_experiment_(
+            algorithm=partial(fast_mimic, workers=self.workers),
+            pop_size=("Population Size", self.population_sizes),
+            keep_pct=("Keep Percent", self.keep_percent_list),
+        )
@@ -0,0 +1,183 @@
+import numpy as np
+
+# Bit i of a row is bit (7 - i % 8) of byte i // 8, as laid out by np.packbits
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1)
+LEADING_ONES = np.argmin(np.hstack((BYTE_BITS, np.zeros((256, 1), np.uint8))), axis=1)
+TRAILING_ZEROS = np.argmax(np.hstack((BYTE_BITS[:, ::-1], np.ones((256, 1), np.uint8))), axis=1)
+
+
+def bit_masks(columns):
+    return (0x80 >> (np.asarray(columns) % 8)).astype(np.uint8)
+
+
+def unique_rows(rows):
+    # Index of the first of each distinct row, and which of those each row
+    # is, from np.unique over the rows viewed as single byte strings
+    rows = np.ascontiguousarray(rows)
+    view = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    _, first, inverse = np.unique(view, return_index=True, return_inverse=True)
+    return first, inverse.ravel()
+
+
+class PackedPopulation:
+    """Binary population with each individual's bits packed into uint8 words.
+
+    Rows are padded to whole bytes with zero bits, and every operation keeps
+    the padding zero so fitness kernels can work on the packed bytes directly.
+    """
+
+    def __init__(self, bits, length):
+        self.bits = np.ascontiguousarray(bits, dtype=np.uint8)
+        self.length = length
+
+    @classmethod
+    def from_states(cls, states):
+        states = np.asarray(states)
+        return cls(np.packbits(states != 0, axis=1), states.shape[1])
+
+    @classmethod
+    def random(cls, pop_size, length):
+        bits = np.random.randint(0, 256, (pop_size, (length + 7) // 8), dtype=np.uint8)
+        population = cls(bits, length)
+        population.clear_padding()
+        return population
+
+    def __len__(self):
+        return len(self.bits)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def clear_padding(self):
+        padding = 8 * self.bits.shape[1] - self.length
+        if padding > 0:
+            self.bits[:, -1] &= np.uint8((0xFF << padding) & 0xFF)
+
+    def unpack(self, rows=None):
+        bits = self.bits if rows is None else self.bits[rows]
+        return np.unpackbits(bits, axis=1, count=self.length)
+
+    def take(self, rows):
+        return PackedPopulation(self.bits[rows], self.length)
+
+    def concatenate(self, other):
+        return PackedPopulation(np.vstack((self.bits, other.bits)), self.length)
+
+    def row_keys(self):
+        return [row.tobytes() for row in self.bits]
+
+    def get_bits(self, rows, columns):
+        columns = np.asarray(columns)
+        return (self.bits[rows, columns // 8] & bit_masks(columns)) != 0
+
+    def flip_bits(self, rows, columns):
+        # Repeated (row, column) pairs flip more than once, like repeated XORs
+        columns = np.asarray(columns)
+        np.bitwise_xor.at(self.bits, (rows, columns // 8), bit_masks(columns))
+
+    def uniform_crossover(self, parents_1, parents_2):
+        # Each child bit comes from either parent with equal probability
+        mask = np.random.randint(0, 256, (len(parents_1), self.bits.shape[1]), dtype=np.uint8)
+        bits = (self.bits[parents_1] & mask) | (self.bits[parents_2] & ~mask)
+        return PackedPopulation(bits, self.length)
+
+    def one_point_crossover(self, parents_1, parents_2):
+        # Bits before a random point 1..length-1 come from parent 1, the rest from parent 2
+        points = 1 + np.random.randint(max(self.length - 1, 1), size=len(parents_1))
+        byte_index = np.arange(self.bits.shape[1])[np.newaxis, :]
+        point_byte = (points // 8)[:, np.newaxis]
+        partial = ((0xFF << (8 - points % 8)) & 0xFF)[:, np.newaxis]
+        mask = np.where(
+            byte_index < point_byte, 0xFF, np.where(byte_index == point_byte, partial, 0)
+        ).astype(np.uint8)
+        bits = (self.bits[parents_1] & mask) | (self.bits[parents_2] & ~mask)
+        return PackedPopulation(bits, self.length)
+
+    def swap_mutate(self, mutation_prob):
+        # Like mlrose's default SwapMutator: with probability mutation_prob a
+        # child swaps the values at two random positions
+        rows = np.flatnonzero(np.random.random_sample(len(self)) < mutation_prob)
+        first = np.random.randint(self.length, size=len(rows))
+        second = np.random.randint(self.length, size=len(rows))
+        differ = self.get_bits(rows, first) != self.get_bits(rows, second)
+        rows, first, second = rows[differ], first[differ], second[differ]
+        self.flip_bits(rows, first)
+        self.flip_bits(rows, second)
+
+    def flip_mutate(self, mutation_prob):
+        # Flip every bit independently with probability mutation_prob, drawing
+        # geometric gaps between flipped bits so the cost is O(flips)
+        total_bits = len(self) * self.length
+        if mutation_prob <= 0 or total_bits == 0:
+            return
+        positions = []
+        last = -1
+        while last < total_bits:
+            gaps = np.random.geometric(mutation_prob, size=int(total_bits * mutation_prob) + 64)
+            block = last + np.cumsum(gaps)
+            positions.append(block[block < total_bits])
+            last = block[-1]
+        positions = np.concatenate(positions)
+        self.flip_bits(positions // self.length, positions % self.length)
+
+
+class IntPopulation:
+    """Population of integer states with the PackedPopulation interface, for
+    problems with more than two values per element."""
+
+    def __init__(self, states, max_val):
+        self.states = np.ascontiguousarray(states, dtype=np.uint8 if max_val <= 256 else np.int64)
+        self.length = self.states.shape[1]
+        self.max_val = max_val
+
+    @classmethod
+    def random(cls, pop_size, length, max_val):
+        return cls(np.random.randint(0, max_val, (pop_size, length)), max_val)
+
+    def __len__(self):
+        return len(self.states)
+
+    @property
+    def nbytes(self):
+        return self.states.nbytes
+
+    def unpack(self, rows=None):
+        return self.states if rows is None else self.states[rows]
+
+    def take(self, rows):
+        return IntPopulation(self.states[rows], self.max_val)
+
+    def concatenate(self, other):
+        return IntPopulation(np.vstack((self.states, other.states)), self.max_val)
+
+    def row_keys(self):
+        return [row.tobytes() for row in self.states]
+
+    def uniform_crossover(self, parents_1, parents_2):
+        mask = np.random.randint(0, 2, (len(parents_1), self.length), dtype=bool)
+        return IntPopulation(
+            np.where(mask, self.states[parents_1], self.states[parents_2]), self.max_val
+        )
+
+    def one_point_crossover(self, parents_1, parents_2):
+        points = 1 + np.random.randint(max(self.length - 1, 1), size=len(parents_1))
+        mask = np.arange(self.length)[np.newaxis, :] < points[:, np.newaxis]
+        return IntPopulation(
+            np.where(mask, self.states[parents_1], self.states[parents_2]), self.max_val
+        )
+
+    def swap_mutate(self, mutation_prob):
+        rows = np.flatnonzero(np.random.random_sample(len(self)) < mutation_prob)
+        first = np.random.randint(self.length, size=len(rows))
+        second = np.random.randint(self.length, size=len(rows))
+        first_values = self.states[rows, first]
+        self.states[rows, first] = self.states[rows, second]
+        self.states[rows, second] = first_values
+
+    def flip_mutate(self, mutation_prob):
+        # Change every element independently with probability mutation_prob
+        # to one of the other values
+        rows, columns = np.nonzero(np.random.random_sample(self.states.shape) < mutation_prob)
+        draws = np.random.randint(self.max_val - 1, size=len(rows))
+        self.states[rows, columns] = draws + (draws >= self.states[rows, columns])
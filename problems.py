@@ -3,19 +3,512 @@ import sys
 import six
 
 sys.modules["sklearn.externals.six"] = six
+from functools import partial
+from time import perf_counter
+
 import mlrose_hiive as mh
 import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from fitness import FastFourPeaks, FastKnapsack, FastMaxKColor
+from fitness_cache import FitnessCache
+from packed import unique_rows
+from visited_index import VisitedIndex
+
+
+class FastDiscreteOpt(mh.DiscreteOpt):
+    """DiscreteOpt that scores whole populations at once when the fitness
+    function provides an evaluate_many(population) method.
+
+    When the fitness function also provides track/neighbor_fitness/commit,
+    single-element neighbors from random_neighbor are scored from the tracked
+    totals of the current state instead of from scratch.
+
+    enable_fitness_cache puts a bounded LRU cache keyed by the packed state in
+    front of every evaluation. Cache hits are not counted as evaluations.
+
+    enable_visited_index puts a VisitedIndex of recently scored states in
+    front of the cache. The hash of a neighbor from random_neighbor is found
+    from the current state's in constant time, so a climb or anneal that
+    comes back to a state skips scoring it again. The index counts the
+    evaluations it avoided.
+
+    set_budget limits each algorithm run to a number of seconds since
+    start_run, or of fitness evaluations. can_stop reports when the budget is
+    spent, and the algorithms check it once per iteration, so a run ends at
+    most one iteration past its budget. can_stop also reports when the fitness
+    reaches the target_fitness set with set_target, such as the optimum from
+    the problem's optimum_oracle.
+
+    With deduplicate_populations set, each population is scored once per
+    distinct state and the scores are copied to its duplicates, so only the
+    evaluations made are counted.
+
+    enable_warm_start computes a start state with the problem's
+    warm_start_heuristic. Each run then starts from it instead of a random
+    state, until an iteration has been taken from it, so later restarts start
+    at random, and a fraction of the first random population is replaced by
+    copies of it.
+    """
+
+    def __init__(
+        self,
+        length,
+        fitness_fn,
+        maximize=True,
+        max_val=2,
+        crossover=None,
+        mutator=None,
+        incremental=True,
+    ):
+        super().__init__(
+            length,
+            fitness_fn,
+            maximize=maximize,
+            max_val=max_val,
+            crossover=crossover,
+            mutator=mutator,
+        )
+        self.incremental = incremental and hasattr(fitness_fn, "neighbor_fitness")
+        self._move = None
+        self.fitness_cache = None
+        # Path and digest of the stored instance this problem was built from
+        self.instance = None
+        # Population of an engine with its own population type, kept here so a
+        # checkpoint of the problem includes it
+        self.engine_population = None
+        self._resume_random_state = None
+        self._resumed_population = False
+        self.budget_seconds = None
+        self.budget_fevals = None
+        self.run_start_time = None
+        # Picklable function returning the best fitness of the problem, or
+        # None when it cannot tell
+        self.optimum_oracle = None
+        self.target_fitness = None
+        self.visited_index = None
+        # Last neighbor from random_neighbor as [state, index, old value,
+        # hash], and the hash of the current state, once known
+        self._neighbor = None
+        self._state_hash = None
+        # Picklable function returning a good start state, or None
+        self.warm_start_heuristic = None
+        self.warm_state = None
+        self.warm_fraction = 0.0
+        self.warm_start_info = None
+        self._warm_pending = False
+        self.deduplicate_populations = False
+
+    def enable_fitness_cache(self, max_size):
+        self.fitness_cache = FitnessCache(max_size)
+
+    def enable_visited_index(self, size):
+        key_bytes = len(self.state_key(np.zeros(self.length, dtype=np.int64)))
+        self.visited_index = VisitedIndex(size, self.length, self.max_val, key_bytes)
+
+    def enable_warm_start(self, fraction=0.1):
+        if self.warm_start_heuristic is None:
+            raise Exception("""problem has no warm start heuristic.""")
+        if (fraction <= 0) or (fraction > 1):
+            raise Exception("""warm start fraction must be above 0 and at most 1.""")
+
+        start = perf_counter()
+        self.warm_state = np.asarray(self.warm_start_heuristic(), dtype=np.int64)
+        seconds = perf_counter() - start
+        self.warm_fraction = fraction
+        self.warm_start_info = {
+            "fraction": fraction,
+            "seconds": seconds,
+            "fitness": float(self.fitness_fn.evaluate(self.warm_state)),
+        }
+
+    def warm_rows(self, pop_size):
+        # Copies of the warm state that start a population of pop_size, none
+        # once the run has moved on from its warm start
+        rows = int(round(self.warm_fraction * pop_size)) if self._warm_pending else 0
+        return np.tile(self.warm_state, (rows, 1))
+
+    def set_budget(self, seconds=None, fevals=None):
+        if seconds is None and fevals is None:
+            raise Exception("""budget needs seconds or fevals.""")
+        if (seconds is not None and seconds <= 0) or (fevals is not None and fevals <= 0):
+            raise Exception("""budget seconds and fevals must be positive.""")
+        self.budget_seconds = seconds
+        self.budget_fevals = fevals
+
+    def optimum(self):
+        return None if self.optimum_oracle is None else self.optimum_oracle()
+
+    def set_target(self, fitness):
+        self.target_fitness = fitness
+
+    def start_run(self):
+        # Called by the runners before each algorithm run, so one grid
+        # configuration never reuses fitness values from another, and each
+        # gets the whole budget
+        self.run_start_time = perf_counter()
+        # The runner's reset and the algorithm's own both start from the warm
+        # state, so the iteration count of the last run must not end it
+        self._warm_pending = self.warm_state is not None
+        self.current_iteration = 0
+        if self.fitness_cache is not None:
+            self.fitness_cache.clear()
+        if self.visited_index is not None:
+            self.visited_index.clear()
+
+    def can_stop(self):
+        # get_fitness is multiplied by maximize, so minimizing targets compare
+        # the same way
+        if (
+            self.target_fitness is not None
+            and self.get_fitness() >= self.maximize * self.target_fitness
+        ):
+            return True
+        if self.budget_fevals is not None and self.fitness_evaluations >= self.budget_fevals:
+            return True
+        if (
+            self.budget_seconds is not None
+            and self.run_start_time is not None
+            and perf_counter() - self.run_start_time >= self.budget_seconds
+        ):
+            return True
+        return super().can_stop()
+
+    def state_key(self, state):
+        state = np.asarray(state)
+        if self.max_val == 2:
+            return np.packbits(state != 0).tobytes()
+        return state.astype(np.uint8 if self.max_val <= 256 else np.uint16).tobytes()
+
+    def packed_rows(self, population):
+        if self.max_val == 2:
+            return np.packbits(population != 0, axis=1)
+        return population.astype(np.uint8 if self.max_val <= 256 else np.uint16)
+
+    def population_keys(self, population):
+        return [row.tobytes() for row in self.packed_rows(population)]
+
+    def resume_from(self, state, random_state, run_start_time):
+        # The next reset() and random_pop() continue the checkpointed run with
+        # these attributes instead of drawing a random start. run_start_time
+        # is set back by the time the run took before the checkpoint, so that
+        # time counts against the budget.
+        self.__dict__.update(state)
+        self.run_start_time = run_start_time
+        self._resume_random_state = random_state
+
+    def resumed_population(self):
+        # True once after a reset() that resumed a checkpoint, when the
+        # population should be kept instead of drawn
+        resumed, self._resumed_population = self._resumed_population, False
+        return resumed
+
+    def reset(self):
+        if self._resume_random_state is not None:
+            np.random.set_state(self._resume_random_state)
+            self._resume_random_state = None
+            self._resumed_population = True
+            return
+
+        self._resumed_population = False
+        self._move = None
+        self._neighbor = None
+        self._state_hash = None
+        if self._warm_pending and self.current_iteration > 0:
+            self._warm_pending = False
+        if self._warm_pending:
+            self.state = self.warm_state.copy()
+            self.fitness = self.eval_fitness(self.state)
+            self.fevals = {}
+            self.fitness_evaluations = 0
+        else:
+            super().reset()
+        if self.incremental:
+            self.fitness_fn.track(self.state)
+
+    def random_neighbor(self):
+        # Same draws as DiscreteOpt.random_neighbor, remembering the move made
+        neighbor = np.copy(self.state)
+        i = np.random.randint(0, self.length)
+        old_value = neighbor[i]
+
+        if self.max_val == 2:
+            neighbor[i] = np.abs(neighbor[i] - 1)
+        else:
+            vals = list(np.arange(self.max_val))
+            vals.remove(neighbor[i])
+            neighbor[i] = vals[np.random.randint(0, self.max_val - 1)]
+
+        self._move = (neighbor, i, neighbor[i]) if self.incremental else None
+        self._neighbor = [neighbor, i, old_value, None] if self.visited_index is not None else None
+        return neighbor
+
+    def eval_fitness(self, state):
+        if self.visited_index is not None:
+            state_hash = self._hash_of(state)
+            key = lambda: self.state_key(state)
+            fitness = self.visited_index.get(state_hash, key)
+            if fitness is None:
+                fitness = self._eval_cached(state)
+                self.visited_index.put(state_hash, key(), fitness)
+            return fitness
+        return self._eval_cached(state)
+
+    def _hash_of(self, state):
+        neighbor = self._neighbor
+        if neighbor is None or state is not neighbor[0]:
+            return self.visited_index.state_hash(state)
+        if neighbor[3] is None:
+            if self._state_hash is None:
+                self._state_hash = self.visited_index.state_hash(self.state)
+            neighbor[3] = self.visited_index.neighbor_hash(
+                self._state_hash, neighbor[1], neighbor[2], state[neighbor[1]]
+            )
+        return neighbor[3]
+
+    def _eval_cached(self, state):
+        if self.fitness_cache is None:
+            return self._eval_uncached(state)
+
+        key = self.state_key(state)
+        fitness = self.fitness_cache.get(key)
+        if fitness is None:
+            fitness = self._eval_uncached(state)
+            self.fitness_cache.put(key, fitness)
+        return fitness
+
+    def _eval_uncached(self, state):
+        if self._move is None or state is not self._move[0]:
+            return super().eval_fitness(state)
+
+        _, index, value = self._move
+        fitness = self.maximize * self.fitness_fn.neighbor_fitness(index, value)
+        self.fitness_evaluations += 1
+        return fitness
+
+    def set_state(self, new_state):
+        neighbor = self._neighbor
+        if self._move is not None and new_state is self._move[0]:
+            _, index, value = self._move
+            self.fitness = self.eval_fitness(new_state)
+            self.fitness_fn.commit(index, value)
+            self.state = new_state
+            self._move = None
+        else:
+            self._move = None
+            super().set_state(new_state)
+            if self.incremental:
+                self.fitness_fn.track(self.state)
+
+        # A neighbor's hash, found when it was scored, is the new state's
+        moved = neighbor is not None and new_state is neighbor[0]
+        self._state_hash = neighbor[3] if moved else None
+        self._neighbor = None
+
+    def random_pop(self, pop_size):
+        if self.resumed_population():
+            return
+        if not hasattr(self.fitness_fn, "evaluate_many"):
+            return super().random_pop(pop_size)
+
+        if pop_size <= 0:
+            raise Exception("pop_size must be a positive integer.")
+        elif not isinstance(pop_size, int):
+            if pop_size.is_integer():
+                pop_size = int(pop_size)
+            else:
+                raise Exception("pop_size must be a positive integer.")
+
+        # Draws the same random stream as one randint call per state
+        self.population = np.random.randint(0, self.max_val, (pop_size, self.length))
+        warm = self.warm_rows(pop_size)
+        self.population[: len(warm)] = warm
+        self.evaluate_population_fitness()
+
+    def set_population(self, new_population, evaluate_many=None):
+        # evaluate_many scores the rows in place of the fitness function's
+        # own, such as a ShardedScorer's
+        if evaluate_many is None:
+            return super().set_population(new_population)
+
+        self.population = new_population
+        self.pop_fitness = self.eval_population_fitness(new_population, evaluate_many)
+
+    def evaluate_population_fitness(self):
+        if not hasattr(self.fitness_fn, "evaluate_many"):
+            return super().evaluate_population_fitness()
+
+        self.pop_fitness = self.eval_population_fitness(self.population)
+
+    def eval_population_fitness(self, population, evaluate_many=None):
+        population = np.asarray(population)
+        if population.ndim != 2 or population.shape[1] != self.length:
+            raise Exception("population must be a (population x length) array")
+
+        if evaluate_many is None:
+            evaluate_many = self.fitness_fn.evaluate_many
+        keys = None if self.fitness_cache is None else self.population_keys(population)
+        packed = self.packed_rows(population) if self.deduplicate_populations else None
+        return self._eval_rows(population, evaluate_many, keys, packed)
+
+    def eval_packed_population_fitness(self, packed):
+        # Scores a PackedPopulation, on the packed bytes when the fitness
+        # function has a packed kernel
+        if self.max_val != 2 or packed.length != self.length:
+            raise Exception("packed populations need a bit string problem of the same length")
+
+        if hasattr(self.fitness_fn, "evaluate_packed"):
+            evaluate = lambda bits: self.fitness_fn.evaluate_packed(bits, packed.length)
+        else:
+            evaluate = lambda bits: self.fitness_fn.evaluate_many(
+                np.unpackbits(bits, axis=1, count=packed.length)
+            )
+
+        keys = None if self.fitness_cache is None else packed.row_keys()
+        unique = packed.bits if self.deduplicate_populations else None
+        return self._eval_rows(packed.bits, evaluate, keys, unique)
+
+    def _eval_rows(self, rows, evaluate, keys=None, packed=None):
+        # packed holds the rows as bytes when duplicate rows are to be scored
+        # once
+        if packed is not None:
+            first, inverse = unique_rows(packed)
+            if len(first) < len(rows):
+                unique_keys = None if keys is None else [keys[i] for i in first]
+                return self._eval_rows(rows[first], evaluate, unique_keys)[inverse]
+
+        if keys is None:
+            pop_fitness = self.maximize * evaluate(rows)
+            self.fitness_evaluations += len(rows)
+            return pop_fitness
+
+        pop_fitness = np.empty(len(rows))
+        missing = []
+        for i, key in enumerate(keys):
+            fitness = self.fitness_cache.get(key)
+            if fitness is None:
+                missing.append(i)
+            else:
+                pop_fitness[i] = fitness
+
+        if len(missing) > 0:
+            scored = self.maximize * evaluate(rows[missing])
+            self.fitness_evaluations += len(missing)
+            for i, fitness in zip(missing, scored):
+                pop_fitness[i] = fitness
+                self.fitness_cache.put(keys[i], fitness)
+        return pop_fitness
+
+
+def four_peaks_optimum(length, t_pct):
+    # Runs of ones and zeros both longer than the threshold t earn the bonus of
+    # length, with length - t - 1 left for the longer run. Without room for
+    # both, a single run of the whole length is best.
+    threshold = int(np.ceil(t_pct * length))
+    if length >= 2 * (threshold + 1):
+        return 2 * length - threshold - 1
+    return length
+
+
+def knapsack_optimum(weights, values, capacity, max_cells=2**28):
+    """Best value of the 0/1 knapsack, by dynamic programming over every
+    capacity up to the limit, one array update per item. Takes
+    O(items x capacity) time and O(capacity) memory.
+
+    The generated capacity grows with the number of items, so the time grows
+    about with its cube. Above max_cells items x capacity, about 1100 generated
+    items or a second and a half of work, it returns None as for an unknown
+    optimum.
+    """
+    capacity = int(capacity)
+    if len(weights) * (capacity + 1) > max_cells:
+        return None
+    best = np.zeros(capacity + 1, dtype=np.int64)
+    for weight, value in zip(np.asarray(weights).tolist(), np.asarray(values).tolist()):
+        if weight <= capacity:
+            best[weight:] = np.maximum(best[weight:], best[:-weight] + value)
+    return int(best[-1])
+
+
+def k_color_optimum(length, u, v):
+    """Fewest conflicts of a coloring when the graph is bipartite, or None.
+
+    Self loops conflict whatever the colors, and the other edges of a
+    bipartite graph can all be colored apart with two colors. The graph is
+    bipartite when no node is connected to its own copy in the double cover,
+    where edge (a, b) joins a to the copy of b and b to the copy of a.
+    """
+    u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+    loops = u == v
+    a, b = u[~loops], v[~loops]
+    cover = coo_matrix(
+        (np.ones(2 * len(a)), (np.concatenate((a, b)), np.concatenate((b + length, a + length)))),
+        shape=(2 * length, 2 * length),
+    )
+    _, labels = connected_components(cover, directed=False)
+    if np.any(labels[:length] == labels[length:]):
+        return None
+    return int(loops.sum())
+
+
+def knapsack_greedy(weights, values, capacity):
+    """Items taken in order of value per unit weight, skipping any that no
+    longer fit."""
+    weights, values = np.asarray(weights), np.asarray(values)
+    state = np.zeros(len(weights), dtype=np.int64)
+    room = capacity
+    for item in np.argsort(-values / weights, kind="stable").tolist():
+        if weights[item] <= room:
+            state[item] = 1
+            room -= weights[item]
+    return state
+
+
+def k_color_dsatur(length, u, v, max_val):
+    """DSATUR coloring with max_val colors.
+
+    The next node colored is the uncolored one whose neighbors already use the
+    most distinct colors, then the one of highest degree. It takes the color
+    fewest of its colored neighbors have, so with too few colors the
+    conflicts are kept low instead of avoided. Self loops are ignored, as they
+    conflict whatever the colors.
+    """
+    u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+    keep = u != v
+    u, v = u[keep], v[keep]
+    adjacency = coo_matrix(
+        (np.ones(2 * len(u)), (np.concatenate((u, v)), np.concatenate((v, u)))),
+        shape=(length, length),
+    ).tocsr()
+    degree = np.diff(adjacency.indptr)
+
+    state = np.zeros(length, dtype=np.int64)
+    colored = np.zeros(length, dtype=bool)
+    # neighbor_colors[n, c] is the number of colored neighbors of n with color c
+    neighbor_colors = np.zeros((length, max_val), dtype=np.int64)
+    for _ in range(length):
+        saturation = (neighbor_colors > 0).sum(axis=1)
+        priority = np.where(colored, -1, saturation * (length + 1) + degree)
+        node = int(np.argmax(priority))
+        color = int(np.argmin(neighbor_colors[node]))
+        state[node] = color
+        colored[node] = True
+        neighbors = adjacency.indices[adjacency.indptr[node] : adjacency.indptr[node + 1]]
+        neighbor_colors[neighbors, color] += 1
+    return state
 
 
 def get_four_peaks_problem(length, threshold_percentage=0.15):
 
-    f_four_peaks = mh.FourPeaks(t_pct=threshold_percentage)
+    f_four_peaks = FastFourPeaks(t_pct=threshold_percentage)
 
-    four_peaks_problem = mh.DiscreteOpt(length, f_four_peaks)
+    four_peaks_problem = FastDiscreteOpt(length, f_four_peaks)
+    four_peaks_problem.optimum_oracle = partial(four_peaks_optimum, length, threshold_percentage)
     return four_peaks_problem
 
 
-def get_knapsack_problem(length, max_weight_pct=0.35, seed=None):
+def get_knapsack_items(length, seed=None):
     if seed is not None:
         np.random.seed(seed)
 
@@ -23,26 +516,115 @@ def get_knapsack_problem(length, max_weight_pct=0.35, seed=None):
     max_value = length
     weights = np.random.randint(1, high=max_weight, size=length)
     values = np.random.randint(1, high=max_value, size=length)
+    return {"weights": weights, "values": values}
+
+
+def get_knapsack_problem(length, max_weight_pct=0.35, seed=None, instance_store=None):
+    if instance_store is None or seed is None:
+        instance = get_knapsack_items(length, seed=seed)
+    else:
+        instance = instance_store.get(
+            "knapsack", length, seed, lambda: get_knapsack_items(length, seed=seed)
+        )
 
-    f_knapsack = mh.Knapsack(weights, values, max_weight_pct=max_weight_pct)
+    f_knapsack = FastKnapsack(
+        instance["weights"], instance["values"], max_weight_pct=max_weight_pct
+    )
     maximize = True
     # Only use bit strings
     max_val = 2
-    knapsack_problem = mh.DiscreteOpt(length, f_knapsack, max_val=max_val, maximize=maximize)
+    knapsack_problem = FastDiscreteOpt(length, f_knapsack, max_val=max_val, maximize=maximize)
+    oracle = partial(knapsack_optimum, f_knapsack.weights, f_knapsack.values, f_knapsack._w)
+    if hasattr(instance, "info"):
+        knapsack_problem.instance = instance.info()
+        oracle = partial(
+            instance_store.get_value,
+            instance.path,
+            f"optimum__max_weight_pct_{max_weight_pct}",
+            oracle,
+        )
+    knapsack_problem.optimum_oracle = oracle
+    knapsack_problem.warm_start_heuristic = partial(
+        knapsack_greedy, f_knapsack.weights, f_knapsack.values, f_knapsack._w
+    )
     return knapsack_problem
 
 
-def get_k_colors_problem(length, edge_percentage=0.3, seed=None, max_val=2):
+def triangle_to_edges(positions, length):
+    # Map positions in the row-major upper triangle (diagonal included) of a
+    # length x length matrix to (start, end) node pairs
+    row_starts = np.arange(length, dtype=np.int64) * (2 * length + 1 - np.arange(length)) // 2
+    row_counts = np.diff(np.searchsorted(positions, row_starts), append=len(positions))
+    start = np.repeat(np.arange(length, dtype=np.int64), row_counts)
+    end = positions - np.repeat(row_starts - np.arange(length), row_counts)
+    return np.column_stack((start, end))
+
+
+def get_random_edges(length, edge_percentage=0.3, sampling="mask", block_size=2**22):
+    """Sample each (start, end) pair with start <= end as an edge with
+    probability edge_percentage, using the global numpy random state.
+
+    "mask" draws one uniform per pair in the same order as the original
+    pair-by-pair loop, so a seed gives exactly the graph it always has.
+    "skip" draws geometric gaps between edges, which is O(edges) and the
+    better choice for large sparse graphs.
+    """
+    pair_count = length * (length + 1) // 2
+    if edge_percentage <= 0 or pair_count == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    if sampling == "mask":
+        positions = []
+        for block_start in range(0, pair_count, block_size):
+            draws = np.random.random_sample(min(block_size, pair_count - block_start))
+            positions.append(np.flatnonzero(draws < edge_percentage) + block_start)
+        positions = np.concatenate(positions)
+    elif sampling == "skip":
+        positions = []
+        last = -1
+        expected = int(pair_count * edge_percentage) + 1
+        while last < pair_count:
+            gaps = np.random.geometric(edge_percentage, size=max(expected // 4, 1024))
+            block = last + np.cumsum(gaps)
+            positions.append(block[block < pair_count])
+            last = block[-1]
+        positions = np.concatenate(positions)
+    else:
+        raise Exception(f"Unsupported edge sampling of {sampling}")
+
+    return triangle_to_edges(positions, length)
+
+
+def get_k_colors_graph(length, edge_percentage=0.3, seed=None, sampling="mask"):
     if seed is not None:
         np.random.seed(seed)
 
-    edges = []
-    for start in range(length):
-        for end in range(start, length):
-            if np.random.random_sample() < edge_percentage:
-                edges.append((start, end))
-    f_max_k_color = mh.MaxKColor(edges)
-    print(edges)
+    edges = get_random_edges(length, edge_percentage=edge_percentage, sampling=sampling)
+    return {"u": edges[:, 0].astype(np.int32), "v": edges[:, 1].astype(np.int32)}
+
+
+def get_k_colors_problem(
+    length, edge_percentage=0.3, seed=None, max_val=2, sampling="mask", instance_store=None
+):
+    build = lambda: get_k_colors_graph(
+        length, edge_percentage=edge_percentage, seed=seed, sampling=sampling
+    )
+    if instance_store is None or seed is None:
+        instance = build()
+    else:
+        instance = instance_store.get(
+            "k_color", length, seed, build, edge_percentage=edge_percentage, sampling=sampling
+        )
+
+    f_max_k_color = FastMaxKColor.from_endpoints(instance["u"], instance["v"])
     maximize = False
-    k_color_problem = mh.DiscreteOpt(length, f_max_k_color, max_val=max_val, maximize=maximize)
+    k_color_problem = FastDiscreteOpt(length, f_max_k_color, max_val=max_val, maximize=maximize)
+    k_color_problem.optimum_oracle = partial(
+        k_color_optimum, length, f_max_k_color.u, f_max_k_color.v
+    )
+    k_color_problem.warm_start_heuristic = partial(
+        k_color_dsatur, length, f_max_k_color.u, f_max_k_color.v, max_val
+    )
+    if hasattr(instance, "info"):
+        k_color_problem.instance = instance.info()
     return k_color_problem
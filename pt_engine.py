@@ -0,0 +1,361 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import copy
+import multiprocessing
+from threading import BrokenBarrierError
+from time import perf_counter
+
+import numpy as np
+from mlrose_hiive.decorators import short_name
+
+from helpers import can_start_workers
+from rhc_engine import restart_seed
+from runners import FinalSaveMixin, SARunner, recorded_iterations
+
+
+def swap_probability(fitness_i, fitness_j, temperature_i, temperature_j):
+    # Metropolis acceptance of exchanging the states of two replicas, with
+    # Boltzmann weights exp(fitness / T) for the maximized problem fitness
+    exponent = (fitness_j - fitness_i) * (1.0 / temperature_i - 1.0 / temperature_j)
+    return 1.0 if exponent >= 0 else float(np.exp(exponent))
+
+
+class Replica:
+    """A Metropolis chain at one fixed temperature.
+
+    Each replica has its own copy of the problem and its own numpy random
+    state, so it makes the same moves in a worker process of its own as it
+    does taking turns with the other replicas in one process.
+    """
+
+    def __init__(self, problem, temperature, seed, start_time):
+        self.problem = problem
+        self.temperature = temperature
+        np.random.seed(seed)
+        problem.reset()
+        self.random_state = np.random.get_state()
+        self.start_time = start_time
+
+        self.iteration = 0
+        self.stopped = False
+        self.best_fitness = problem.get_fitness()
+        self.fitness = [problem.get_adjusted_fitness()]
+        self.fevals = [problem.fitness_evaluations]
+        self.times = [perf_counter() - start_time]
+        self.states = {0: problem.get_state().copy()}
+
+    def anneal(self, until, iteration_list):
+        # The steps of simulated_annealing at a constant temperature
+        problem = self.problem
+        np.random.set_state(self.random_state)
+        while self.iteration < until and not self.stopped:
+            self.iteration += 1
+            problem.current_iteration += 1
+
+            next_state = problem.random_neighbor()
+            next_fitness = problem.eval_fitness(next_state)
+            delta_e = next_fitness - problem.get_fitness()
+            if (delta_e > 0) or (np.random.uniform() < np.exp(delta_e / self.temperature)):
+                problem.set_state(next_state)
+
+            self.best_fitness = max(self.best_fitness, problem.get_fitness())
+            self.fitness.append(problem.get_adjusted_fitness())
+            self.fevals.append(problem.fitness_evaluations)
+            self.times.append(perf_counter() - self.start_time)
+            self.stopped = problem.can_stop()
+            if self.iteration in iteration_list:
+                self.states[self.iteration] = problem.get_state().copy()
+        self.random_state = np.random.get_state()
+
+    def exchange(self, state):
+        # Scoring the state handed over counts as one evaluation, as with any
+        # set_state
+        self.problem.set_state(state.astype(self.problem.get_state().dtype))
+
+    def trace(self):
+        self.states[self.iteration] = self.problem.get_state().copy()
+        return {
+            "fitness": np.array(self.fitness, dtype=float),
+            "fevals": np.array(self.fevals, dtype=np.int64),
+            "time": np.array(self.times),
+            "states": self.states,
+        }
+
+
+class Ladder:
+    """Swap and stop decisions between rounds, over replicas in order of
+    temperature. Even rounds offer swaps to pairs (0, 1), (2, 3) and so on,
+    odd rounds to pairs (1, 2), (3, 4) and so on."""
+
+    def __init__(self, temperatures, seed, max_attempts, max_iters, swap_interval):
+        self.temperatures = temperatures
+        self.random_state = np.random.RandomState(seed)
+        self.max_attempts = max_attempts
+        self.max_iters = max_iters
+        self.swap_interval = swap_interval
+        self.best_fitness = -np.inf
+        self.attempts = 0
+        self.offered = np.zeros(len(temperatures) - 1, dtype=np.int64)
+        self.accepted = np.zeros(len(temperatures) - 1, dtype=np.int64)
+
+    def round_end(self, round_number):
+        return min((round_number + 1) * self.swap_interval, self.max_iters)
+
+    def exchange(self, round_number, states, fitness, best_fitness, stopped):
+        # Swaps states and fitness in place. Returns which replicas were handed
+        # a new state, and whether the run is over.
+        if best_fitness.max() > self.best_fitness:
+            self.best_fitness = best_fitness.max()
+            self.attempts = 0
+        else:
+            self.attempts += self.round_end(round_number) - self.round_end(round_number - 1)
+        stop = bool(
+            stopped.any()
+            or (self.round_end(round_number) >= self.max_iters)
+            or (self.attempts >= self.max_attempts)
+        )
+
+        swapped = np.zeros(len(self.temperatures), dtype=bool)
+        if stop:
+            return swapped, stop
+        for i in range(round_number % 2, len(self.temperatures) - 1, 2):
+            self.offered[i] += 1
+            probability = swap_probability(
+                fitness[i], fitness[i + 1], self.temperatures[i], self.temperatures[i + 1]
+            )
+            if self.random_state.uniform() < probability:
+                states[[i, i + 1]] = states[[i + 1, i]]
+                fitness[[i, i + 1]] = fitness[[i + 1, i]]
+                swapped[[i, i + 1]] = True
+                self.accepted[i] += 1
+        return swapped, stop
+
+
+def _shared_arrays(shared, replicas, length):
+    return (
+        np.frombuffer(shared["states"], dtype=np.float64).reshape(replicas, length),
+        np.frombuffer(shared["fitness"], dtype=np.float64),
+        np.frombuffer(shared["best_fitness"], dtype=np.float64),
+        np.frombuffer(shared["stopped"], dtype=np.int8),
+        np.frombuffer(shared["swapped"], dtype=np.int8),
+    )
+
+
+def _publish(replica, index, states, fitness, best_fitness, stopped):
+    states[index] = replica.problem.get_state()
+    fitness[index] = replica.problem.get_fitness()
+    best_fitness[index] = replica.best_fitness
+    stopped[index] = replica.stopped
+
+
+def _replica_worker(replica, index, ladder, iteration_list, shared, barrier, results):
+    states, fitness, best_fitness, stopped, swapped = _shared_arrays(
+        shared, len(ladder.temperatures), replica.problem.length
+    )
+    try:
+        round_number = 0
+        while True:
+            replica.anneal(ladder.round_end(round_number), iteration_list)
+            _publish(replica, index, states, fitness, best_fitness, stopped)
+            # The parent exchanges states between the two waits
+            barrier.wait()
+            barrier.wait()
+            if shared["stop"].value:
+                break
+            if swapped[index]:
+                replica.exchange(states[index])
+            round_number += 1
+    except BrokenBarrierError:
+        return
+    except BaseException:
+        barrier.abort()
+        raise
+    results.put((index, replica.trace()))
+
+
+@short_name("pt")
+class ParallelTemperingRunner(FinalSaveMixin, SARunner):
+    """Replica-exchange annealing: one replica per temperature of
+    temperature_list, each a Metropolis chain at that constant temperature in
+    a worker process of its own. Every swap_interval iterations the replicas
+    stop at a barrier, and neighboring temperatures swap states with the
+    Metropolis probability through shared memory.
+
+    Swaps are decided in the parent process from the seed, and every replica
+    draws from its own stream seeded from (seed, replica), so the results do
+    not depend on process scheduling. When worker processes cannot be started,
+    the replicas take turns in one process with the same results.
+
+    The run stops after max_iters iterations, once the best fitness of all
+    replicas has not improved for max_attempts iterations, or when any replica
+    reaches problem.can_stop(). The run_stats and curves files have a set of
+    rows per temperature, as for SA. FEvals count the evaluations of the
+    whole ladder and Time is the wall time since the ladder started, so both
+    compare with the other algorithms for the same work.
+    """
+
+    def __init__(self, *args, swap_interval=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        if min(self.temperature_list) <= 0:
+            raise Exception("""Parallel tempering temperatures must be positive.""")
+        if swap_interval < 1:
+            raise Exception("""swap_interval must be a positive integer.""")
+        self.swap_interval = swap_interval
+        self.ladder = None
+
+    def run(self):
+        self._setup()
+        temperatures = sorted(float(t) for t in self.temperature_list)
+        max_iters = int(max(self.iteration_list))
+        self.parameter_description_dict = {"temperature": "Temperature"}
+
+        self._start_run_timing()
+        replicas = [
+            Replica(
+                self._replica_problem(len(temperatures)),
+                temperature,
+                restart_seed(self.seed, index),
+                self._run_start_time,
+            )
+            for index, temperature in enumerate(temperatures)
+        ]
+        self.ladder = Ladder(
+            temperatures, self.seed, self.max_attempts, max_iters, self.swap_interval
+        )
+
+        if can_start_workers(len(replicas)):
+            traces = self._run_in_processes(replicas)
+        else:
+            traces = self._run_in_turn(replicas)
+        self._add_rows(traces, temperatures, max_iters)
+
+        self._create_and_save_run_data_frames(final_save=True)
+        self._tear_down()
+        return self.run_stats_df, self.curves_df
+
+    def _replica_problem(self, replicas):
+        problem = copy.deepcopy(self.problem)
+        # An evaluation budget is shared out between the replicas
+        if getattr(problem, "budget_fevals", None) is not None:
+            problem.budget_fevals = int(np.ceil(problem.budget_fevals / replicas))
+        return problem
+
+    def _run_in_turn(self, replicas):
+        length = self.problem.length
+        states = np.zeros((len(replicas), length))
+        fitness, best_fitness = np.zeros(len(replicas)), np.zeros(len(replicas))
+        stopped = np.zeros(len(replicas), dtype=np.int8)
+
+        round_number = 0
+        while True:
+            for index, replica in enumerate(replicas):
+                replica.anneal(self.ladder.round_end(round_number), self.iteration_list)
+                _publish(replica, index, states, fitness, best_fitness, stopped)
+            swapped, stop = self.ladder.exchange(
+                round_number, states, fitness, best_fitness, stopped
+            )
+            if stop:
+                break
+            for index in np.flatnonzero(swapped):
+                replicas[index].exchange(states[index])
+            round_number += 1
+        return [replica.trace() for replica in replicas]
+
+    def _run_in_processes(self, replicas):
+        length = self.problem.length
+        shared = {
+            "states": multiprocessing.RawArray("d", len(replicas) * length),
+            "fitness": multiprocessing.RawArray("d", len(replicas)),
+            "best_fitness": multiprocessing.RawArray("d", len(replicas)),
+            "stopped": multiprocessing.RawArray("b", len(replicas)),
+            "swapped": multiprocessing.RawArray("b", len(replicas)),
+            "stop": multiprocessing.RawValue("b", 0),
+        }
+        states, fitness, best_fitness, stopped, swapped = _shared_arrays(
+            shared, len(replicas), length
+        )
+        barrier = multiprocessing.Barrier(len(replicas) + 1)
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=_replica_worker,
+                args=(replica, index, self.ladder, self.iteration_list, shared, barrier, results),
+                daemon=True,
+            )
+            for index, replica in enumerate(replicas)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            round_number = 0
+            while True:
+                barrier.wait()
+                round_swapped, stop = self.ladder.exchange(
+                    round_number, states, fitness, best_fitness, stopped
+                )
+                swapped[:] = round_swapped
+                shared["stop"].value = stop
+                barrier.wait()
+                if stop:
+                    break
+                round_number += 1
+        except BrokenBarrierError:
+            for worker in workers:
+                worker.join()
+            raise Exception("""A parallel tempering replica failed.""")
+
+        traces = [None] * len(replicas)
+        for _ in replicas:
+            index, trace = results.get()
+            traces[index] = trace
+        for worker in workers:
+            worker.join()
+        return traces
+
+    def _add_rows(self, traces, temperatures, max_iters):
+        # FEvals of the whole ladder at every iteration, holding each replica
+        # at its last count once it has stopped
+        iterations = max(len(trace["fevals"]) for trace in traces)
+        fevals = sum(
+            np.pad(trace["fevals"], (0, iterations - len(trace["fevals"])), mode="edge")
+            for trace in traces
+        )
+
+        for trace, temperature in zip(traces, temperatures):
+            last_iteration = len(trace["fitness"]) - 1
+            labels = {"Temperature": temperature, "max_iters": max_iters}
+
+            for iteration, state in trace["states"].items():
+                done = iteration > 0 and iteration == last_iteration
+                for i in recorded_iterations(self.iteration_list, iteration, done):
+                    run_stat = {
+                        "Iteration": i,
+                        "Fitness": trace["fitness"][iteration],
+                        "FEvals": fevals[iteration],
+                        "Time": trace["time"][iteration],
+                        "State": self._sanitize_value(state),
+                    }
+                    run_stat.update(labels)
+                    self._raw_run_stats.append(run_stat)
+
+            for iteration in range(last_iteration + 1):
+                curve_stat = {
+                    "Iteration": iteration,
+                    "Time": trace["time"][iteration],
+                    "Fitness": trace["fitness"][iteration],
+                    "FEvals": float(fevals[iteration]),
+                }
+                curve_stat.update(labels)
+                self._fitness_curves.append(curve_stat)
+
+    def info(self):
+        offered = np.maximum(self.ladder.offered, 1)
+        return {
+            "swap_interval": self.swap_interval,
+            "temperatures": self.ladder.temperatures,
+            "swap_acceptance": (self.ladder.accepted / offered).round(4).tolist(),
+        }
@@ -0,0 +1,115 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import itertools as it
+
+import numpy as np
+import pandas as pd
+
+from runners import configuration_labels, configured_runner, grid_parameters, save_merged_runs
+
+
+def rung_budgets(iteration_list, rungs, eliminate):
+    # Iteration budget of each rung, growing by 1 / (1 - eliminate) per rung up
+    # to max(iteration_list). Budgets are snapped down to iteration_list points
+    # so every rung ends on a recorded row.
+    checkpoints = np.asarray(iteration_list)[np.asarray(iteration_list) > 0]
+    max_iters = checkpoints.max()
+    budgets = []
+    for rung in range(rungs):
+        target = max_iters * (1 - eliminate) ** (rungs - 1 - rung)
+        reachable = checkpoints[checkpoints <= target]
+        budgets.append(reachable.max() if len(reachable) > 0 else checkpoints.min())
+    return sorted(set(budgets))
+
+
+class RacingRunner:
+    """Successive halving over the grid of a built runner.
+
+    Every configuration of the grid is first run with a small iteration budget.
+    After each rung the worst eliminate fraction of the configurations, by
+    best fitness so far, is dropped, and the rest are run again from the start
+    with a larger budget, up to max(iteration_list) on the last rung. A rung
+    run is the runner's own run with that configuration and the iteration_list
+    cut at the budget, so its rows match the start of a full run.
+
+    The run_stats and curves files hold the rows of each configuration's last
+    run, in grid order, and racing_df records the rung and budget each
+    configuration reached and whether it was eliminated there.
+    """
+
+    def __init__(self, runner, maximize, rungs=3, eliminate=0.5):
+        if (eliminate <= 0) or (eliminate >= 1):
+            raise Exception("""eliminate must be between 0 and 1.""")
+        if rungs < 1:
+            raise Exception("""rungs must be a positive integer.""")
+
+        self.runner = runner
+        self.maximize = maximize
+        self.eliminate = eliminate
+        self.parameters = grid_parameters(runner)
+        self.budgets = rung_budgets(runner.iteration_list, rungs, eliminate)
+        self.racing_df = None
+
+    def configurations(self):
+        grid = [getattr(self.runner, name) for name in self.parameters]
+        return [dict(zip(self.parameters, values)) for values in it.product(*grid)]
+
+    def run_configuration(self, configuration, budget):
+        iteration_list = np.asarray(self.runner.iteration_list)
+        return configured_runner(
+            self.runner, configuration, iteration_list[iteration_list <= budget]
+        ).run()
+
+    def score(self, run_stats):
+        fitness = run_stats["Fitness"].astype(float)
+        return fitness.max() if self.maximize else -fitness.min()
+
+    def run(self):
+        configurations = self.configurations()
+        results = [None] * len(configurations)
+        records = [None] * len(configurations)
+
+        racing = list(range(len(configurations)))
+        for rung, budget in enumerate(self.budgets):
+            scores = []
+            for index in racing:
+                results[index] = self.run_configuration(configurations[index], budget)
+                scores.append(self.score(results[index][0]))
+
+            if rung < len(self.budgets) - 1:
+                keep = max(1, len(racing) - int(len(racing) * self.eliminate))
+            else:
+                keep = len(racing)
+            ranking = np.argsort(-np.array(scores), kind="stable")
+
+            for position, rank in enumerate(ranking):
+                index = racing[rank]
+                record = configuration_labels(self.runner, configurations[index])
+                record.update(
+                    {
+                        "Rung": rung,
+                        "Iterations": int(budget),
+                        "Fitness": scores[rank] if self.maximize else -scores[rank],
+                        "Eliminated": position >= keep,
+                    }
+                )
+                records[index] = record
+            racing = sorted(racing[rank] for rank in ranking[:keep])
+            print(
+                f"    Racing rung {rung} of {int(budget)} iterations kept {keep} of {len(ranking)}"
+            )
+
+        self.racing_df = pd.DataFrame(records)
+        return save_merged_runs(self.runner, results, {"racing_df": self.racing_df})
+
+    def info(self):
+        survivors = self.racing_df[~self.racing_df["Eliminated"]]
+        return {
+            "rungs": [int(budget) for budget in self.budgets],
+            "eliminate": self.eliminate,
+            "configurations": len(self.racing_df),
+            "survivors": len(survivors),
+        }
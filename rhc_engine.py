@@ -0,0 +1,200 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import multiprocessing
+from functools import partial
+from multiprocessing.pool import Pool
+from time import perf_counter
+
+import numpy as np
+
+from helpers import can_start_workers, default_workers
+from runners import FinalSaveMixin, RHCRunner, recorded_iterations
+
+
+def restart_seed(seed, restart):
+    # Every restart draws from its own stream, so its climb is the same
+    # whichever worker runs it and whichever restarts ran before it
+    return int(np.random.SeedSequence([seed, restart]).generate_state(1)[0])
+
+
+def climb(problem, seed, max_attempts=10, max_iters=np.inf, iteration_list=()):
+    """One restart of mlrose's random_hill_climb, from its own seed.
+
+    Returns the adjusted fitness, fitness evaluations and time since the climb
+    started at every iteration, the states at iteration 0, the iteration_list
+    points and the last iteration, and whether problem.can_stop() ended it.
+    Evaluations are counted from zero after the random start, as
+    random_hill_climb does for its first restart.
+    """
+    np.random.seed(seed)
+    if hasattr(problem, "start_run"):
+        # A fitness cache carried over from another restart would change the
+        # evaluation counts depending on which worker ran what
+        problem.start_run()
+
+    start = perf_counter()
+    problem.reset()
+    fitness = [problem.get_adjusted_fitness()]
+    fevals = [problem.fitness_evaluations]
+    times = [perf_counter() - start]
+    states = {0: problem.get_state().copy()}
+
+    attempts = 0
+    iters = 0
+    stopped = False
+    while (attempts < max_attempts) and (iters < max_iters):
+        iters += 1
+        problem.current_iteration += 1
+
+        next_state = problem.random_neighbor()
+        next_fitness = problem.eval_fitness(next_state)
+
+        current_fitness = problem.get_fitness()
+        if next_fitness > current_fitness:
+            problem.set_state(next_state)
+            attempts = 0
+        else:
+            attempts += 1
+
+        fitness.append(problem.get_adjusted_fitness())
+        fevals.append(problem.fitness_evaluations)
+        times.append(perf_counter() - start)
+
+        stopped = problem.can_stop()
+        done = (attempts == max_attempts) or (iters == max_iters) or stopped
+        if done or iters in iteration_list:
+            states[iters] = problem.get_state().copy()
+        if done:
+            break
+
+    return {
+        "fitness": np.array(fitness, dtype=float),
+        "fevals": np.array(fevals, dtype=np.int64),
+        "time": np.array(times),
+        "states": states,
+        "stopped": stopped,
+    }
+
+
+# Problem and shared values of a pool worker, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(problem, stop_restart):
+    _worker["problem"] = problem
+    _worker["stop_restart"] = stop_restart
+
+
+def _climb_restart(restart, seed, max_attempts, max_iters, iteration_list):
+    # Restarts after one that reached problem.can_stop() are never reported,
+    # so they are skipped once that restart is known
+    if restart > _worker["stop_restart"].value:
+        return None
+
+    trace = climb(
+        _worker["problem"],
+        restart_seed(seed, restart),
+        max_attempts=max_attempts,
+        max_iters=max_iters,
+        iteration_list=iteration_list,
+    )
+
+    if trace["stopped"]:
+        stop_restart = _worker["stop_restart"]
+        with stop_restart.get_lock():
+            stop_restart.value = min(stop_restart.value, restart)
+    return trace
+
+
+class ParallelRHCRunner(FinalSaveMixin, RHCRunner):
+    """RHCRunner that climbs the restarts in a process pool and merges them
+    into the same run_stats and curves rows, one set per restart_list value.
+
+    Restart r is seeded from (seed, r), so restarts 0 to max(restart_list) are
+    climbed once and shared by every restart_list value, and the results are
+    the same for any number of workers. The first restart that reached
+    problem.can_stop() is kept in shared memory.
+
+    FEvals run on across restarts like random_hill_climb's. Time is the
+    climbing time of the restart and all earlier ones, as if they had run one
+    after another.
+    """
+
+    def __init__(self, *args, workers=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workers = workers if workers is not None else default_workers()
+
+    def run(self):
+        self._setup()
+        max_iters = int(max(self.iteration_list))
+        self.parameter_description_dict = {"restarts": "Restarts"}
+
+        self._start_run_timing()
+        traces = self._climb_restarts(max(self.restart_list), max_iters)
+        for restarts in self.restart_list:
+            self._add_restart_rows(traces[: restarts + 1], restarts, max_iters)
+
+        self._create_and_save_run_data_frames(final_save=True)
+        self._tear_down()
+        return self.run_stats_df, self.curves_df
+
+    def _climb_restarts(self, restarts, max_iters):
+        stop_restart = multiprocessing.Value("l", restarts)
+        climb_restart = partial(
+            _climb_restart,
+            seed=self.seed,
+            max_attempts=self.max_attempts,
+            max_iters=max_iters,
+            iteration_list=self.iteration_list,
+        )
+
+        if can_start_workers(self.workers):
+            initargs = (self.problem, stop_restart)
+            with Pool(self.workers, initializer=_init_worker, initargs=initargs) as pool:
+                traces = pool.map(climb_restart, range(restarts + 1), chunksize=1)
+        else:
+            _init_worker(self.problem, stop_restart)
+            traces = [climb_restart(restart) for restart in range(restarts + 1)]
+        return traces
+
+    def _add_restart_rows(self, traces, restarts, max_iters):
+        fevals_base = 0
+        time_base = 0.0
+        for restart, trace in enumerate(traces):
+            fevals = trace["fevals"] + fevals_base
+            times = trace["time"] + time_base
+            last_iteration = len(fevals) - 1
+            labels = {"Restarts": restarts, "max_iters": max_iters, "current_restart": restart}
+
+            for iteration, state in trace["states"].items():
+                done = iteration > 0 and iteration == last_iteration
+                for i in recorded_iterations(self.iteration_list, iteration, done):
+                    run_stat = {
+                        "Iteration": i,
+                        "Fitness": trace["fitness"][iteration],
+                        "FEvals": fevals[iteration],
+                        "Time": times[iteration],
+                        "State": self._sanitize_value(state),
+                    }
+                    run_stat.update(labels)
+                    self._raw_run_stats.append(run_stat)
+
+            # Like random_hill_climb's curve, only the first restart has an
+            # iteration 0 row
+            for iteration in range(0 if restart == 0 else 1, last_iteration + 1):
+                curve_stat = {
+                    "Iteration": iteration,
+                    "Time": times[iteration],
+                    "Fitness": trace["fitness"][iteration],
+                    "FEvals": float(fevals[iteration]),
+                }
+                curve_stat.update(labels)
+                self._fitness_curves.append(curve_stat)
+
+            if trace["stopped"]:
+                break
+            fevals_base = fevals[-1]
+            time_base = times[-1]
@@ -8,10 +8,15 @@ from core_code import run_mjob, run_multi_job
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Random Optimization Solver Job Runner")
     parser.add_argument("job_files", help="The job file to run", nargs="+")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the unfinished tasks of each job's latest run from their checkpoints",
+    )
 
     args = parser.parse_args()
     for job_file in args.job_files:
         print(f"STARTING {job_file}")
         print("*******************************************")
-        run_mjob(job_file)
+        run_mjob(job_file, resume=args.resume)
         print("")
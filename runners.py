@@ -0,0 +1,102 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import copy
+
+import mlrose_hiive as mh
+
+from checkpoint import CheckpointMixin
+
+
+class ProblemHookMixin:
+    """Lets the problem know when the runner starts each algorithm run."""
+
+    def _start_run_timing(self):
+        super()._start_run_timing()
+        if hasattr(self.problem, "start_run"):
+            self.problem.start_run()
+
+
+def recorded_iterations(iteration_list, iteration, done):
+    # Iterations _RunnerBase._save_state writes a run_stats row for: 0, the
+    # iteration list points, and every remaining point once a run is done
+    if iteration == 0:
+        return [0]
+    if iteration not in iteration_list and not done:
+        return []
+    remaining_iterations = [i for i in iteration_list if i >= iteration]
+    return remaining_iterations if done else [min(remaining_iterations)]
+
+
+def grid_parameters(runner):
+    # Runner attribute holding each grid list, and the column it is saved as
+    if isinstance(runner, mh.RHCRunner):
+        return {"restart_list": "Restarts"}
+    if isinstance(runner, mh.SARunner):
+        return {"temperature_list": "Temperature", "decay_list": "Decay"}
+    if isinstance(runner, mh.GARunner):
+        return {"population_sizes": "Population Size", "mutation_rates": "Mutation Rate"}
+    if isinstance(runner, mh.MIMICRunner):
+        return {"population_sizes": "Population Size", "keep_percent_list": "Keep Percent"}
+    raise Exception(f"Unsupported runner of {type(runner).__name__}")
+
+
+def configuration_labels(runner, configuration):
+    # Column name and value of each grid setting, with decays given by name
+    return {
+        label: getattr(configuration[name], "__name__", configuration[name])
+        for name, label in grid_parameters(runner).items()
+    }
+
+
+def configured_runner(runner, configuration, iteration_list=None):
+    # Shallow copy of a runner that runs one value of each grid list and writes
+    # nothing to disk, checkpoints included. The copy shares the problem, so
+    # copies in one process must run one at a time.
+    configured = copy.copy(runner)
+    configured._output_directory = None
+    configured.checkpoint_path = None
+    configured._resume = None
+    if iteration_list is not None:
+        configured.iteration_list = iteration_list
+    for name, value in configuration.items():
+        setattr(configured, name, [value])
+    return configured
+
+
+def save_merged_runs(runner, results, extra_data_frames=None):
+    # Saves the (run_stats, curves) results of configured copies of runner as
+    # runner's own run_stats and curves files
+    runner._raw_run_stats = [
+        row for run_stats, _ in results for row in run_stats.to_dict("records")
+    ]
+    runner._fitness_curves = [row for _, curves in results for row in curves.to_dict("records")]
+    runner._create_and_save_run_data_frames(extra_data_frames=extra_data_frames, final_save=True)
+    return runner.run_stats_df, runner.curves_df
+
+
+class FinalSaveMixin:
+    """Writes the run_stats and curves files once, when the run finishes,
+    instead of rebuilding and rewriting them after every recorded iteration."""
+
+    def _create_and_save_run_data_frames(self, extra_data_frames=None, final_save=False):
+        if final_save:
+            super()._create_and_save_run_data_frames(extra_data_frames, final_save=final_save)
+
+
+class RHCRunner(CheckpointMixin, ProblemHookMixin, mh.RHCRunner):
+    pass
+
+
+class SARunner(CheckpointMixin, ProblemHookMixin, mh.SARunner):
+    pass
+
+
+class GARunner(CheckpointMixin, ProblemHookMixin, mh.GARunner):
+    pass
+
+
+class MIMICRunner(CheckpointMixin, ProblemHookMixin, mh.MIMICRunner):
+    pass
@@ -0,0 +1,210 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+from time import perf_counter
+
+import mlrose_hiive as mh
+import numpy as np
+import pandas as pd
+
+from runners import SARunner, recorded_iterations
+
+
+class ScheduleGrid:
+    """Temperatures of a list of mlrose decay schedules, one per chain,
+    evaluated together as arrays."""
+
+    def __init__(self, schedules):
+        self.schedules = schedules
+        self.init_temp = np.array([s.init_temp for s in schedules], dtype=float)
+        self.min_temp = np.array([s.min_temp for s in schedules], dtype=float)
+        self.geom = np.array([isinstance(s, mh.GeomDecay) for s in schedules])
+        self.arith = np.array([isinstance(s, mh.ArithDecay) for s in schedules])
+        self.exp = np.array([isinstance(s, mh.ExpDecay) for s in schedules])
+        self.rate = np.array(
+            [
+                s.exp_const if isinstance(s, mh.ExpDecay) else getattr(s, "decay", 0.0)
+                for s in schedules
+            ],
+            dtype=float,
+        )
+        self.custom = np.flatnonzero(~(self.geom | self.arith | self.exp))
+
+    def evaluate(self, iteration):
+        temperatures = np.where(
+            self.geom,
+            self.init_temp * self.rate**iteration,
+            np.where(
+                self.arith,
+                self.init_temp - self.rate * iteration,
+                self.init_temp * np.exp(-self.rate * iteration),
+            ),
+        )
+        temperatures = np.maximum(temperatures, self.min_temp)
+        for chain in self.custom:
+            temperatures[chain] = self.schedules[chain].evaluate(iteration)
+        return temperatures
+
+
+def lockstep_annealing(problem, schedules, max_attempts=10, max_iters=np.inf, callback=None):
+    """Simulated annealing run for every schedule at once, one chain per row
+    of a (chains x length) state array.
+
+    Each step every running chain proposes a single element change, the
+    proposals are scored with one evaluate_many call, and the Metropolis test
+    is applied to all chains together with their own temperatures. All chains
+    start from the same random state, as mlrose's SA does for a given seed.
+
+    callback(iteration, chains, states, fitness, fevals, done) is called at
+    iteration 0 and after every step with the chains that took the step.
+    Fitness is the raw fitness function value, and FEvals count a proposal and
+    an accepted move as one evaluation each, like mlrose's set_state does. A
+    chain stops once it reaches the problem's target_fitness, if it has one.
+    """
+    grid = ScheduleGrid(schedules)
+    fitness_fn = problem.fitness_fn
+    if hasattr(fitness_fn, "evaluate_many"):
+        evaluate_many = fitness_fn.evaluate_many
+    else:
+        evaluate_many = lambda population: np.array([fitness_fn.evaluate(s) for s in population])
+
+    target_fitness = getattr(problem, "target_fitness", None)
+
+    state = problem.random()
+    states = np.tile(state, (len(schedules), 1))
+    fitness = np.full(len(schedules), fitness_fn.evaluate(state), dtype=float)
+    fevals = np.zeros(len(schedules), dtype=np.int64)
+    attempts = np.zeros(len(schedules), dtype=np.int64)
+    active = np.arange(len(schedules))
+
+    if callback is not None:
+        callback(0, active, states, fitness, fevals, np.zeros(len(active), dtype=bool))
+
+    iteration = 0
+    while len(active) > 0:
+        temperatures = grid.evaluate(iteration)[active]
+        iteration += 1
+
+        # A chain whose temperature reaches zero stops without moving
+        cold = temperatures == 0
+        if np.any(cold):
+            if callback is not None:
+                callback(
+                    iteration, active[cold], states, fitness, fevals, np.ones(cold.sum(), bool)
+                )
+            active, temperatures = active[~cold], temperatures[~cold]
+            if len(active) == 0:
+                break
+
+        index = np.random.randint(problem.length, size=len(active))
+        old_values = states[active, index]
+        if problem.max_val == 2:
+            new_values = 1 - old_values
+        else:
+            draws = np.random.randint(problem.max_val - 1, size=len(active))
+            new_values = draws + (draws >= old_values)
+
+        states[active, index] = new_values
+        next_fitness = evaluate_many(states[active])
+
+        delta = problem.maximize * (next_fitness - fitness[active])
+        accept_prob = np.exp(np.minimum(delta, 0) / temperatures)
+        accept = (delta > 0) | (np.random.random_sample(len(active)) < accept_prob)
+
+        rejected = ~accept
+        states[active[rejected], index[rejected]] = old_values[rejected]
+        fitness[active[accept]] = next_fitness[accept]
+        fevals[active] += 1 + accept
+        attempts[active] = np.where(accept, 0, attempts[active] + 1)
+
+        done = (attempts[active] >= max_attempts) | (iteration >= max_iters)
+        if target_fitness is not None:
+            done |= problem.maximize * fitness[active] >= problem.maximize * target_fitness
+        if (
+            callback is not None
+            and callback(iteration, active, states, fitness, fevals, done) is False
+        ):
+            break
+        active = active[~done]
+
+    return states, fitness
+
+
+class LockstepSARunner(SARunner):
+    """SARunner that anneals the whole temperature x decay grid in lockstep
+    with lockstep_annealing and writes the same run_stats and curves files.
+
+    Time is the wall time since the grid started, shared by all chains.
+    """
+
+    def run(self):
+        self._setup()
+        schedules = [d(init_temp=t) for t in self.temperature_list for d in self.decay_list]
+        max_iters = int(max(self.iteration_list))
+        self.parameter_description_dict = {"schedule": "Temperature"}
+
+        self._stats_rows = [[] for _ in schedules]
+        self._curve_history = []
+        self._schedules = schedules
+        self._max_iters = max_iters
+
+        np.random.seed(self.seed)
+        self._start_run_timing()
+        lockstep_annealing(
+            self.problem,
+            schedules,
+            max_attempts=self.max_attempts,
+            max_iters=max_iters,
+            callback=self._save_chains,
+        )
+
+        self._raw_run_stats = [row for rows in self._stats_rows for row in rows]
+        self._fitness_curves = self._build_curves()
+        self._create_and_save_run_data_frames(final_save=True)
+        self._tear_down()
+        return self.run_stats_df, self.curves_df
+
+    def _save_chains(self, iteration, chains, states, fitness, fevals, done):
+        t = perf_counter() - self._run_start_time
+        self._curve_history.append((iteration, t, chains, fitness[chains], fevals[chains]))
+
+        for chain, chain_done in zip(chains, done):
+            schedule = self._schedules[chain]
+            for i in recorded_iterations(self.iteration_list, iteration, chain_done):
+                run_stat = {
+                    "Iteration": i,
+                    "Fitness": fitness[chain],
+                    "FEvals": fevals[chain],
+                    "Time": t,
+                    "State": self._sanitize_value(states[chain].copy()),
+                }
+                run_stat.update(schedule.get_info__(t))
+                run_stat.update({"Temperature": schedule, "max_iters": self._max_iters})
+                self._stats_rows[chain].append(run_stat)
+        return not self.has_aborted()
+
+    def _build_curves(self):
+        # One curve row per chain per iteration, chain by chain like SARunner
+        iterations = np.concatenate([np.full(len(h[2]), h[0]) for h in self._curve_history])
+        times = np.concatenate([np.full(len(h[2]), h[1]) for h in self._curve_history])
+        chains = np.concatenate([h[2] for h in self._curve_history])
+        fitness = np.concatenate([h[3] for h in self._curve_history])
+        fevals = np.concatenate([h[4] for h in self._curve_history])
+
+        curves = []
+        for chain, schedule in enumerate(self._schedules):
+            rows = chains == chain
+            curve = pd.DataFrame(
+                {
+                    "Iteration": iterations[rows],
+                    "Time": times[rows],
+                    "Fitness": fitness[rows],
+                    "FEvals": fevals[rows],
+                }
+            )
+            curve["Temperature"] = [schedule] * len(curve)
+            curve["max_iters"] = self._max_iters
+            curves.append(curve)
+        return pd.concat(curves, ignore_index=True).to_dict("records")
@@ -0,0 +1,215 @@
+import sys
+
+import six
+
+sys.modules["sklearn.externals.six"] = six
+import warnings
+from time import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+
+from helpers import NestablePool, can_start_workers
+from runners import configuration_labels, configured_runner, grid_parameters, save_merged_runs
+
+INTEGER_PARAMETERS = ["restart_list", "population_sizes"]
+
+
+class SearchSpace:
+    """Ranges read from a runner's grid lists. Decays are categories, and
+    numeric lists span their smallest to largest value, in whole numbers for
+    restarts and population sizes. Positive ranges covering a factor of 10
+    or more are searched on a log scale. Configurations are encoded into
+    [0, 1] coordinates, one per numeric range and category."""
+
+    def __init__(self, runner):
+        self.categories = {}
+        self.ranges = {}
+        for name in grid_parameters(runner):
+            values = getattr(runner, name)
+            if name == "decay_list":
+                self.categories[name] = list(values)
+                continue
+            low, high = float(min(values)), float(max(values))
+            log_scale = low > 0 and high / low >= 10
+            self.ranges[name] = (low, high, log_scale)
+
+    def _scale(self, name, values):
+        low, high, log_scale = self.ranges[name]
+        if high == low:
+            return np.zeros(len(values))
+        if log_scale:
+            values, low, high = np.log(values), np.log(low), np.log(high)
+        return (values - low) / (high - low)
+
+    def sample(self, count, random_state):
+        configurations = [{} for _ in range(count)]
+        for name, (low, high, log_scale) in self.ranges.items():
+            if log_scale:
+                values = np.exp(random_state.uniform(np.log(low), np.log(high), count))
+            else:
+                values = random_state.uniform(low, high, count)
+            if name in INTEGER_PARAMETERS:
+                values = np.round(values).astype(int)
+            for configuration, value in zip(configurations, values.tolist()):
+                configuration[name] = value
+        for name, categories in self.categories.items():
+            for configuration, index in zip(
+                configurations, random_state.randint(len(categories), size=count)
+            ):
+                configuration[name] = categories[index]
+        return configurations
+
+    def encode(self, configurations):
+        columns = []
+        for name in self.ranges:
+            columns.append(
+                self._scale(name, np.array([c[name] for c in configurations], dtype=float))
+            )
+        for name, categories in self.categories.items():
+            for category in categories:
+                columns.append(np.array([c[name] is category for c in configurations], dtype=float))
+        return np.column_stack(columns) if columns else np.zeros((len(configurations), 0))
+
+
+def expected_improvement(mean, std, best):
+    std = np.maximum(std, 1e-12)
+    z = (mean - best) / std
+    return (mean - best) * norm.cdf(z) + std * norm.pdf(z)
+
+
+def _run_trial(runner):
+    start_time = time()
+    run_stats, curves = runner.run()
+    return run_stats, curves, time() - start_time
+
+
+class SearchRunner:
+    """Model-based search over the ranges of a built runner's grid lists.
+
+    The first batch of configurations is drawn at random. After that, one
+    Gaussian process models each configuration's best fitness and another its
+    log run time, and each batch takes the candidates with the highest
+    expected improvement per predicted second. Within a batch, each chosen
+    configuration is added to the fitness model at its predicted value before
+    choosing the next one. This keeps the batch from piling onto one point.
+
+    The configurations of a batch run in a process pool, each as the runner's
+    own run with that one configuration. The run_stats and curves files hold
+    every trial's rows in trial order, and search_df records each trial's
+    batch, settings, best fitness and run time. Proposals depend on measured
+    run times, so they can differ between otherwise identical searches.
+    """
+
+    def __init__(self, runner, maximize, budget=20, batch=4, candidates=500, workers=None):
+        if budget < 1:
+            raise Exception("""budget must be a positive integer.""")
+        if batch < 1:
+            raise Exception("""batch must be a positive integer.""")
+
+        self.runner = runner
+        self.maximize = maximize
+        self.budget = budget
+        self.batch = batch
+        self.candidates = candidates
+        self.workers = workers if workers is not None else batch
+        self.space = SearchSpace(runner)
+        self.random_state = np.random.RandomState(runner.seed)
+        self.search_df = None
+
+    def score(self, run_stats):
+        fitness = run_stats["Fitness"].astype(float)
+        return fitness.max() if self.maximize else -fitness.min()
+
+    def propose(self, tried, scores, run_times, count):
+        candidates = self.space.sample(self.candidates, self.random_state)
+        tried_keys = {tuple(row) for row in self.space.encode(tried)} if tried else set()
+        candidates = [
+            c
+            for c, row in zip(candidates, self.space.encode(candidates))
+            if tuple(row) not in tried_keys
+        ]
+        if len(tried) == 0 or len(candidates) <= count:
+            return candidates[:count]
+
+        kernel = Matern(nu=2.5) + WhiteKernel()
+        x = self.space.encode(tried)
+        y = np.array(scores, dtype=float)
+        candidate_x = self.space.encode(candidates)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            time_model = GaussianProcessRegressor(kernel=kernel, normalize_y=True, random_state=0)
+            time_model.fit(x, np.log(run_times))
+            seconds = np.exp(time_model.predict(candidate_x))
+
+            chosen = []
+            fitness_model = GaussianProcessRegressor(
+                kernel=kernel, normalize_y=True, random_state=0
+            )
+            for _ in range(count):
+                fitness_model.fit(x, y)
+                mean, std = fitness_model.predict(candidate_x, return_std=True)
+                acquisition = expected_improvement(mean, std, y.max()) / seconds
+                acquisition[chosen] = -np.inf
+                pick = int(np.argmax(acquisition))
+                chosen.append(pick)
+                x = np.vstack((x, candidate_x[pick]))
+                y = np.append(y, mean[pick])
+        return [candidates[i] for i in chosen]
+
+    def run_batch(self, configurations):
+        runners = [configured_runner(self.runner, c) for c in configurations]
+        workers = min(self.workers, len(runners))
+        if not can_start_workers(workers):
+            return [_run_trial(runner) for runner in runners]
+        # Trials of an engine with workers of its own can start them
+        with NestablePool(workers) as pool:
+            return pool.map(_run_trial, runners, chunksize=1)
+
+    def run(self):
+        tried, scores, run_times, results, records = [], [], [], [], []
+        batch_number = 0
+        while len(tried) < self.budget:
+            count = min(self.batch, self.budget - len(tried))
+            configurations = self.propose(tried, scores, run_times, count)
+            if len(configurations) == 0:
+                break
+
+            for configuration, (run_stats, curves, run_time) in zip(
+                configurations, self.run_batch(configurations)
+            ):
+                score = float(self.score(run_stats))
+                record = {"Trial": len(tried), "Batch": batch_number}
+                record.update(configuration_labels(self.runner, configuration))
+                record.update({"Fitness": score if self.maximize else -score, "Run Time": run_time})
+                tried.append(configuration)
+                scores.append(score)
+                run_times.append(max(run_time, 1e-6))
+                results.append((run_stats, curves))
+                records.append(record)
+
+            best = records[int(np.argmax(scores))]
+            print(
+                f"    Search batch {batch_number} ran {len(configurations)} trials, best so far trial {best['Trial']} with {best['Fitness']}"
+            )
+            batch_number += 1
+
+        self.search_df = pd.DataFrame(records)
+        return save_merged_runs(self.runner, results, {"search_df": self.search_df})
+
+    def info(self):
+        best = (
+            self.search_df["Fitness"].idxmax()
+            if self.maximize
+            else self.search_df["Fitness"].idxmin()
+        )
+        return {
+            "budget": self.budget,
+            "batch": self.batch,
+            "trials": len(self.search_df),
+            "best_trial": int(self.search_df["Trial"][best]),
+        }
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class VisitedIndex:
+    """Bounded table of recently scored states and their fitness.
+
+    States are found by Zobrist hash, the XOR of one random 64-bit word per
+    element and value, so the hash of a single-element neighbor comes from
+    its parent's hash in constant time. The table is direct-mapped: each hash
+    has one slot, holding the packed state bytes that confirm a match, and a
+    new state takes the slot over from whichever state was there. Memory stays
+    at size slots, and the states kept are the recently scored ones.
+    """
+
+    def __init__(self, size, length, max_val, key_bytes):
+        if size <= 0:
+            raise Exception("visited index size must be a positive integer.")
+        self.size = int(size)
+        # Drawn from a generator of its own, so the algorithms' random
+        # streams are untouched
+        self.table = np.random.default_rng(0).integers(
+            0, 2**64, (length, max_val), dtype=np.uint64, endpoint=False
+        )
+        self.hashes = np.zeros(self.size, dtype=np.uint64)
+        self.used = np.zeros(self.size, dtype=bool)
+        self.keys = np.zeros((self.size, key_bytes), dtype=np.uint8)
+        self.fitness = np.zeros(self.size)
+        self.avoided = 0
+        self.misses = 0
+        self.replaced = 0
+
+    @property
+    def nbytes(self):
+        return self.hashes.nbytes + self.used.nbytes + self.keys.nbytes + self.fitness.nbytes
+
+    def state_hash(self, state):
+        state = np.asarray(state, dtype=np.int64)
+        return np.bitwise_xor.reduce(self.table[np.arange(len(state)), state])
+
+    def neighbor_hash(self, state_hash, index, old_value, new_value):
+        return state_hash ^ self.table[index, int(old_value)] ^ self.table[index, int(new_value)]
+
+    def get(self, state_hash, key):
+        # key is called for the packed state bytes only when the hash matches
+        slot = int(state_hash) % self.size
+        if self.used[slot] and self.hashes[slot] == state_hash:
+            if self.keys[slot].tobytes() == key():
+                self.avoided += 1
+                return self.fitness[slot]
+        self.misses += 1
+        return None
+
+    def put(self, state_hash, key, fitness):
+        slot = int(state_hash) % self.size
+        if self.used[slot]:
+            self.replaced += 1
+        self.used[slot] = True
+        self.hashes[slot] = state_hash
+        self.keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self.fitness[slot] = fitness
+
+    def clear(self):
+        self.used[:] = False
+
+    def stats(self):
+        lookups = self.avoided + self.misses
+        return {
+            "size": self.size,
+            "bytes": int(self.nbytes),
+            "avoided": self.avoided,
+            "misses": self.misses,
+            "replaced": self.replaced,
+            "avoided_rate": self.avoided / lookups if lookups > 0 else 0.0,
+        }